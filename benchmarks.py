@@ -0,0 +1,462 @@
+"""Benchmarks and test tooling for main.py: a stub Ollama server, offline replay of recorded
+scenarios, and micro-benchmarks of the TTS, notes, intent, wake word and ASR paths.
+Nothing here is imported by the assistant itself.
+
+    python benchmarks.py --benchmark <dir> [--output results.json]
+"""
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from threading import Thread
+
+from PyQt6 import QtWidgets
+
+import main
+from main import (
+    ASR_WORKERS, AUDIO_FRAME_MS, MODEL_NAME, TTS_BACKENDS, ASRService, EdgeTTSBackend,
+    EnergyVAD, FakeTTSBackend, FileAudioSource, GuaranteedTTS, JarvisApp, ListenerThread, NoteWriter,
+    OllamaClient, PhraseAudioCache, ResponseCache, VoicePipeline, check_model_path, intent_router,
+    literal_phrases, llm_scheduler, load_model, log_metric, percentile, speech_queue,
+)
+
+ASR_LOAD_TEST_MAX_LAG = 1.0  # seconds from end of audio to final result for a stream to count as real time
+
+
+def fake_mp3_source(chunk_bytes=600, chunk_delay=0.02, bytes_per_char=60):
+    """Chunk source for EdgeTTSBackend that yields silence at the pace of a network stream"""
+    async def chunks(text):
+        import asyncio
+        remaining = max(chunk_bytes, len(text) * bytes_per_char)
+        while remaining > 0:
+            await asyncio.sleep(chunk_delay)
+            size = min(chunk_bytes, remaining)
+            remaining -= size
+            yield bytes(size)
+    return chunks
+
+def benchmark_tts(count=200):
+    """Time GuaranteedTTS.speak per utterance with the fake backend"""
+    engine = GuaranteedTTS([FakeTTSBackend()])
+    for i in range(count):
+        engine.speak(f"Benchmark utterance number {i}")
+    log_metric("TTS p50 per utterance", percentile(engine.latencies, 50))
+    log_metric("TTS p95 per utterance", percentile(engine.latencies, 95))
+
+def benchmark_phrase_cache(backend_name="fake"):
+    """Time from request to playable audio for each literal phrase: live synthesis against
+    the phrase cache from disk and from memory. Live synthesis time is an upper bound for
+    engines that start playing before they finish rendering."""
+    backend = FakeTTSBackend(synthesis_delay=0.05) if backend_name == "fake" else TTS_BACKENDS[backend_name]()
+    backend.ensure_started()
+    phrases = literal_phrases()
+    live, disk, memory = [], [], []
+    with tempfile.TemporaryDirectory() as directory:
+        writer = PhraseAudioCache(directory)
+        for text in phrases:
+            started = time.perf_counter()
+            audio = backend.synthesize(text)
+            live.append((time.perf_counter() - started) * 1000)
+            if audio is None:
+                print(f"[TTS] {backend.name} cannot render clips")
+                return
+            writer.put(text, backend, audio)
+        reader = PhraseAudioCache(directory)
+        for samples in (disk, memory):
+            for text in phrases:
+                started = time.perf_counter()
+                reader.get(text, backend)
+                samples.append((time.perf_counter() - started) * 1000)
+    backend.close()
+    log_metric("Phrases", len(phrases), "")
+    for label, samples in (("live synthesis", live), ("cache from disk", disk), ("cache from memory", memory)):
+        log_metric(f"Time to audio, {label} p50", percentile(samples, 50))
+        log_metric(f"Time to audio, {label} p95", percentile(samples, 95))
+
+def benchmark_edge_stream(count=20):
+    """Time to first audio of the streamed edge path against waiting for the whole clip,
+    using a fake chunk source and a player that discards its input"""
+    sink = [sys.executable, "-c", "import shutil, sys, os; shutil.copyfileobj(sys.stdin.buffer, open(os.devnull, 'wb'))"]
+    backend = EdgeTTSBackend(chunk_source=fake_mp3_source(), player_cmd=sink)
+    backend.TAIL_SECONDS = 0.0
+    backend.ensure_started()
+    first_audio, whole_clip, overrun = [], [], []
+    for i in range(count):
+        text = f"Benchmark sentence number {i} for streamed playback."
+        started = time.monotonic()
+        backend.speak(text)
+        first_audio.append((backend.first_audio_at - started) * 1000)
+        overrun.append((time.monotonic() - backend.playing_until) * 1000)
+        started = time.monotonic()
+        backend.synthesize(text)
+        whole_clip.append((time.monotonic() - started) * 1000)
+    backend.close()
+    log_metric("Edge first audio, streamed p50", percentile(first_audio, 50))
+    log_metric("Edge first audio, whole clip p50", percentile(whole_clip, 50))
+    log_metric("Edge wait past estimated end p95", percentile(overrun, 95))
+
+def benchmark_intents(count=20000):
+    """Match generated utterances through the intent router and report throughput"""
+    import random
+    templates = [
+        "search for {}", "google {}", "open chrome", "new tab", "close browser", "open youtube",
+        "play {} on spotify", "search spotify for {}", "open spotify", "close spotify", "take notes",
+        "what time is it", "take a screenshot", "hide yourself", "go to sleep", "what is {}",
+        "tell me a joke about {}", "how far away is {}", "explain {} in simple terms",
+    ]
+    words = ["python", "the moon", "jazz", "paris", "black holes", "coffee", "linux kernel", "weather"]
+    rng = random.Random(0)
+    utterances = [rng.choice(templates).format(rng.choice(words)) for _ in range(count)]
+
+    started = time.perf_counter()
+    matched = sum(1 for text in utterances if intent_router.match(text))
+    elapsed = time.perf_counter() - started
+    log_metric("Intent routing", elapsed / count * 1e6, "us/utterance")
+    log_metric("Intent routing throughput", count / elapsed, "utterances/s")
+    print(f"[BENCH] {matched}/{count} utterances matched a built-in intent")
+
+def benchmark_notes(count=50000):
+    """Sustained dictation throughput: one open/write/close per line versus NoteWriter"""
+    folder = tempfile.mkdtemp()
+    lines = [f"[2024-01-01 00:00:00] dictated line number {i}\n" for i in range(count)]
+
+    path = os.path.join(folder, "per_line.txt")
+    started = time.perf_counter()
+    for line in lines:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+    log_metric("Notes per-line open/close", count / (time.perf_counter() - started), "lines/s")
+
+    writer = NoteWriter(os.path.join(folder, "batched.txt"), flush_interval=0.05)
+    started = time.perf_counter()
+    for line in lines:
+        writer.write(line)
+    writer.close()
+    log_metric("Notes NoteWriter", count / (time.perf_counter() - started), "lines/s")
+    log_metric("Notes NoteWriter batches", writer.batches, "")
+    shutil.rmtree(folder, ignore_errors=True)
+
+def replay_wake(wav_path, model, frame_ms=AUDIO_FRAME_MS):
+    """Feed a recording through VoicePipeline in listener-sized frames, as ListenerThread does,
+    and return the audio offsets in seconds of the partial-result wake event and of the final
+    result (None when missing)"""
+    import wave
+    wav = wave.open(wav_path, "rb")
+    if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+        raise ValueError("Expected 16-bit mono WAV")
+    rate = wav.getframerate()
+    pipeline = VoicePipeline(model, rate)
+    frames = int(rate * frame_ms / 1000)
+    position = 0
+    offsets = {}
+
+    def note(events):
+        for event in events:
+            offsets.setdefault("wake" if event[0] == "wake" else "final", position / rate)
+
+    while True:
+        data = wav.readframes(frames)
+        if not data:
+            break
+        position += len(data) // 2
+        note(pipeline.feed(data))
+    note(pipeline.flush())
+    return offsets.get("wake"), offsets.get("final")
+
+def benchmark_wake(wav_path):
+    """Replay a recording through the listener's pipeline and report how far into the audio
+    the partial-result wake event and the final result arrive"""
+    model = load_model()
+    if model is None:
+        return
+    wake_at, final_at = replay_wake(wav_path, model)
+    log_metric("End of speech audio offset", speech_end_offset(wav_path) * 1000)
+    for label, at in (("Partial-result wake", wake_at), ("Final result", final_at)):
+        if at is None:
+            print(f"[BENCH] {label}: not detected")
+        else:
+            log_metric(f"{label} audio offset", at * 1000)
+    if wake_at is not None and final_at is not None:
+        log_metric("Wake latency saved", (final_at - wake_at) * 1000)
+
+def asr_load_test(wav_path, max_streams=64, workers=ASR_WORKERS):
+    """Replay one recording as 1, 2, 4, ... concurrent real-time streams against an in-process
+    ASR service until the final results fall more than ASR_LOAD_TEST_MAX_LAG behind the audio,
+    then report the real-time factor and how many streams one core sustains"""
+    import wave
+    wav = wave.open(wav_path, "rb")
+    if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+        raise ValueError("Expected 16-bit mono WAV")
+    rate = wav.getframerate()
+    pcm = wav.readframes(wav.getnframes())
+    model = load_model()
+    if model is None:
+        return None
+    service = ASRService(model, workers=workers, sample_rate=rate)
+    server = service.serve("127.0.0.1:0")
+    host, port = server.server_address[:2]
+    block = service.block_bytes
+    audio_seconds = len(pcm) / 2 / rate
+
+    def client(lags):
+        sock = socket.create_connection((host, port))
+        sock.sendall((json.dumps({"sample_rate": rate}) + "\n").encode())
+        started = time.monotonic()
+        for offset in range(0, len(pcm), block):
+            time.sleep(max(0.0, started + offset / 2 / rate - time.monotonic()))
+            sock.sendall(pcm[offset:offset + block])
+        sent = time.monotonic()
+        sock.shutdown(socket.SHUT_WR)
+        for line in sock.makefile("rb"):
+            if json.loads(line).get("eof"):
+                break
+        lags.append(time.monotonic() - sent)
+        sock.close()
+
+    cores = min(workers, os.cpu_count() or 1)
+    best = 0
+    streams = 1
+    while streams <= max_streams:
+        cpu_before, audio_before = service.cpu_seconds, service.audio_seconds
+        lags = []
+        threads = [Thread(target=client, args=(lags,), daemon=True) for _ in range(streams)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        rtf = (service.cpu_seconds - cpu_before) / (service.audio_seconds - audio_before or 1)
+        lag = percentile(lags, 95)
+        print(f"[ASR LOAD] {streams:3d} streams: final result p95 {lag * 1000:7.1f} ms after audio, RTF {rtf:.3f}")
+        if lag > ASR_LOAD_TEST_MAX_LAG:
+            break
+        best = streams
+        streams *= 2
+    server.shutdown()
+    server.server_close()
+
+    rtf = service.cpu_seconds / service.audio_seconds if service.audio_seconds else None
+    log_metric("ASR load test audio per stream", audio_seconds, "s")
+    if rtf is not None:
+        log_metric("ASR real-time factor (CPU s per audio s)", f"{rtf:.3f}", "")
+    log_metric("ASR max real-time streams", best, "")
+    log_metric("ASR max real-time streams per core", best / cores, "")
+    if rtf:
+        log_metric("ASR streams per core from RTF", 1 / rtf, "")
+    return {"real_time_factor": rtf, "max_streams": best, "streams_per_core": best / cores}
+
+class StubOllamaServer:
+    """Local stand-in for the Ollama HTTP API that streams a canned answer with simulated delays"""
+    def __init__(self, answer="Paris is the capital of France. It is known for the Eiffel Tower and its museums.",
+                 load_delay=1.0, first_token_delay=0.2, token_delay=0.02, port=0):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        stub = self
+        self.answer = answer
+        self.load_delay = load_delay
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.loaded = set()
+        self.requests = []
+        self.connections = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                stub.connections += 1
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client cancelled mid-stream, as a superseded query does
+
+            def _json(self, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _chunk(self, payload):
+                data = (json.dumps(payload) + "\n").encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def do_GET(self):
+                self._json({"models": [{"name": name, "model": name} for name in stub.loaded]})
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                stub.requests.append(request)
+                load_started = time.perf_counter()
+                if request.get("model") not in stub.loaded:
+                    time.sleep(stub.load_delay)
+                    stub.loaded.add(request.get("model"))
+                load_duration = int((time.perf_counter() - load_started) * 1e9)
+
+                if not request.get("prompt") or request.get("stream") is False:
+                    self._json({"model": request.get("model"), "response": "", "done": True,
+                                "load_duration": load_duration})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                prompt_tokens = len(request["prompt"].split())
+                time.sleep(stub.first_token_delay)
+                for word in stub.answer.split(" "):
+                    self._chunk({"response": word + " ", "done": False})
+                    time.sleep(stub.token_delay)
+                context = list(request.get("context") or []) + list(range(prompt_tokens + len(stub.answer.split())))
+                self._chunk({"response": "", "done": True, "context": context, "load_duration": load_duration,
+                             "prompt_eval_count": prompt_tokens, "prompt_eval_duration": prompt_tokens * 1000000})
+                self.wfile.write(b"0\r\n\r\n")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.address = f"127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def speech_end_offset(wav_path, frame_ms=AUDIO_FRAME_MS):
+    """Seconds into a recording where the last voiced frame ends, per the listener's VAD"""
+    import wave
+    wav = wave.open(wav_path, "rb")
+    vad = EnergyVAD(wav.getframerate())
+    frames = int(wav.getframerate() * frame_ms / 1000)
+    position = end = 0
+    while True:
+        data = wav.readframes(frames)
+        if not data:
+            break
+        position += len(data) // 2
+        vad.process(data)
+        if vad.in_speech and vad.hangover_left == vad.hangover_ms:
+            end = position
+    return end / wav.getframerate()
+
+BENCHMARK_SCENARIOS = ("wake", "oneshot", "command", "llm", "notes")
+
+def run_benchmark(scenario_dir, output=None, timeout=15.0):
+    """Replay <scenario_dir>/<scenario>/*.wav through ListenerThread and JarvisApp with the
+    microphone, Ollama and TTS replaced, and report end-of-speech to first-audio latency.
+    Command recordings should be harmless commands such as "what time is it"."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    stub = StubOllamaServer().start()
+    main.ollama_client = OllamaClient(stub.address)
+    main.response_cache = ResponseCache(max_entries=0, path=None)
+    backend = FakeTTSBackend()
+    main.tts_engine = GuaranteedTTS([backend])
+    notes_path = os.path.join(tempfile.gettempdir(), f"jarvis_bench_notes_{os.getpid()}.txt")
+
+    check_model_path()
+    load_model()
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    window = JarvisApp(listen=False)
+
+    def pump_until(condition, limit):
+        deadline = time.perf_counter() + limit
+        while time.perf_counter() < deadline:
+            app.processEvents()
+            if condition():
+                return True
+            time.sleep(0.002)
+        return False
+
+    def idle():
+        return speech_queue.unfinished_tasks == 0 and not llm_scheduler.workers
+
+    pump_until(lambda: False, 2.0)
+    pump_until(idle, timeout)
+
+    results = {}
+    for scenario in BENCHMARK_SCENARIOS:
+        folder = os.path.join(scenario_dir, scenario)
+        if not os.path.isdir(folder):
+            continue
+        latencies = []
+        missed = 0
+        for name in sorted(os.listdir(folder)):
+            if not name.lower().endswith(".wav"):
+                continue
+            path = os.path.join(folder, name)
+            listener = ListenerThread(FileAudioSource(path, realtime=True))
+            window.listener = listener
+            window.sleep_mode = False
+            window.is_listening = scenario not in ("wake", "oneshot")
+            window.is_writing_notes = scenario == "notes"
+            window.notes_path = notes_path if scenario == "notes" else None
+            listener.wake.connect(window.onWake)
+            listener.wake_command.connect(window.onWakeCommand)
+            listener.text.connect(window.onText)
+            spoken_before = len(backend.spoken)
+            speech_end = speech_end_offset(path)
+            started = time.perf_counter()
+            listener.start()
+
+            if pump_until(lambda: len(backend.spoken) > spoken_before, timeout + speech_end):
+                first_audio = backend.spoken[spoken_before][0]
+                latencies.append((first_audio - started - speech_end) * 1000)
+            else:
+                missed += 1
+            listener.wait()
+            pump_until(idle, timeout)
+
+        results[scenario] = {
+            "runs": len(latencies) + missed,
+            "missed": missed,
+            "p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+            "p95_ms": round(percentile(latencies, 95), 1) if latencies else None,
+            "samples_ms": [round(value, 1) for value in latencies],
+        }
+
+    report = json.dumps({"model": MODEL_NAME, "frame_ms": AUDIO_FRAME_MS, "scenarios": results}, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(report + "\n")
+    print(report)
+    stub.stop()
+    if os.path.exists(notes_path):
+        os.unlink(notes_path)
+    return results
+
+
+if __name__ == "__main__":
+    if "--tts-benchmark" in sys.argv:
+        benchmark_tts()
+    elif "--phrase-cache-benchmark" in sys.argv:
+        index = sys.argv.index("--phrase-cache-benchmark") + 1
+        benchmark_phrase_cache(sys.argv[index] if index < len(sys.argv) else "fake")
+    elif "--edge-stream-benchmark" in sys.argv:
+        benchmark_edge_stream()
+    elif "--notes-benchmark" in sys.argv:
+        benchmark_notes()
+    elif "--intent-benchmark" in sys.argv:
+        benchmark_intents()
+    elif "--benchmark" in sys.argv:
+        output = sys.argv[sys.argv.index("--output") + 1] if "--output" in sys.argv else None
+        run_benchmark(sys.argv[sys.argv.index("--benchmark") + 1], output)
+    elif "--wake-benchmark" in sys.argv:
+        benchmark_wake(sys.argv[sys.argv.index("--wake-benchmark") + 1])
+    elif "--asr-load-test" in sys.argv:
+        check_model_path()
+        max_streams = int(sys.argv[sys.argv.index("--max-streams") + 1]) if "--max-streams" in sys.argv else 64
+        asr_load_test(sys.argv[sys.argv.index("--asr-load-test") + 1], max_streams)
+    else:
+        print(__doc__)
+        print("Other modes: --tts-benchmark, --phrase-cache-benchmark [backend], --edge-stream-benchmark,\n"
+              "--notes-benchmark, --intent-benchmark, --wake-benchmark WAV, --asr-load-test WAV [--max-streams N]")
+        sys.exit(2)
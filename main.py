@@ -1,3 +1,5 @@
+import time
+_PROCESS_STARTED = time.perf_counter()
 import sys
 import subprocess
 import json
@@ -6,21 +8,55 @@ from threading import Thread
 import threading
 import urllib.parse
 import datetime
-from queue import Queue
+from queue import Queue, Empty
 from PyQt6 import QtWidgets, QtCore, QtGui
-import vosk
-import pyaudio
 import os
 import platform
-import tempfile
-import time
+import shutil
+import http.client
+import socket
+import re
+import math
+import heapq
+import struct
+import itertools
+from array import array
+from collections import deque, OrderedDict
 
 MODEL_NAME = "gemma:2b"
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "127.0.0.1:11434")
+OLLAMA_CONNECT_TIMEOUT = 3
+OLLAMA_FIRST_TOKEN_TIMEOUT = 30
+OLLAMA_TOKEN_TIMEOUT = 15
+OLLAMA_KEEP_ALIVE = "30m"  # how long Ollama keeps the model loaded while the assistant is active
+OLLAMA_SLEEP_KEEP_ALIVE = "5m"  # Ollama's own default, restored when the assistant goes to sleep
+LLM_MAX_CONCURRENCY = 1
+CONVERSATION_TOKEN_BUDGET = 2048
+CONVERSATION_MAX_TURNS = 6
+CONVERSATION_FOLLOW_UP_SECONDS = 90  # a question this soon after an answer may refer back to it
 WAKE_WORD = "jarvis"
 HIDE_COMMANDS = ["close", "hide yourself", "minimize"]
 WAKE_PHRASES = ["wake", "wake up", "wake jarvis", "wake me", "wake work jarvis"]
+WAKE_DEBOUNCE_SECONDS = 1.5
+WAKE_REPLAY_MS = 2000  # audio kept in wake-only mode and replayed into the full recognizer on a hit
+SAMPLE_RATE = 16000
+VAD_ENABLED = True
+VAD_HANGOVER_MS = 600
+VAD_PREROLL_MS = 300
+AUDIO_FRAME_MS = 30
+AUDIO_RING_SECONDS = 5
+STATS_REPORT_SECONDS = 300
+ASR_PROCESS = os.getenv("JARVIS_ASR_PROCESS") == "1"  # capture and decode in a child process (or --asr-process)
+ASR_PROCESS_RING_SECONDS = 30  # shared-memory audio kept while the decoder process lags or restarts
+
+_ollama_path = None
 
 def get_ollama_path():
+    """Resolve the Ollama binary once, on first use"""
+    global _ollama_path
+    if _ollama_path:
+        return _ollama_path
+
     system = platform.system()
     if system == "Windows":
         possible_paths = [
@@ -32,230 +68,2522 @@ def get_ollama_path():
     else:
         possible_paths = ["ollama", "/usr/local/bin/ollama"]
 
+    _ollama_path = "ollama"
     for path in possible_paths:
-        if os.path.exists(path):
-            return path
-        try:
-            if system == "Windows":
-                result = subprocess.run(f"where {path}", shell=True, capture_output=True, text=True)
-            else:
-                result = subprocess.run(f"which {path}", shell=True, capture_output=True, text=True)
-            if result.returncode == 0:
-                return path
-        except:
-            continue
-    return "ollama"
+        if os.path.exists(path) or shutil.which(path):
+            _ollama_path = path
+            break
+    print(f"[SYSTEM] Using Ollama path: {_ollama_path}")
+    return _ollama_path
 
-OLLAMA_PATH = get_ollama_path()
-print(f"[SYSTEM] Using Ollama path: {OLLAMA_PATH}")
+def log_metric(name, value, unit="ms"):
+    value = f"{value:.1f}" if isinstance(value, float) else value
+    print(f"[METRIC] {name}: {value} {unit}".rstrip())
 
-BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
 
-speech_queue = Queue()
-
-class GuaranteedTTS:
+class StartupProfile:
+    """Wall-clock timing of each startup stage, printed with --startup-profile"""
     def __init__(self):
-        self.methods = [
-            self.windows_tts_method,
-            self.powershell_tts_method,
-            self.edge_tts_method,
-            self.print_only_method
-        ]
+        self.enabled = False
+        self.stages = []
+        self.lock = threading.Lock()
+        self.reported = False
+
+    def record(self, name, started, ended):
+        with self.lock:
+            self.stages.append((name, started - _PROCESS_STARTED, ended - _PROCESS_STARTED))
+
+    def stage(self, name):
+        profile = self
+
+        class _Stage:
+            def __enter__(self):
+                self.started = time.perf_counter()
+
+            def __exit__(self, *exc):
+                profile.record(name, self.started, time.perf_counter())
 
-    def windows_tts_method(self, text):
-        """Method 1: Windows built-in TTS using SAPI"""
+        return _Stage()
+
+    def report(self):
+        with self.lock:
+            if not self.enabled or self.reported:
+                return
+            self.reported = True
+            stages = sorted(self.stages, key=lambda stage: stage[2])
+        print("[STARTUP] stage                     took (ms)   done at (ms)")
+        for name, started, ended in stages:
+            print(f"[STARTUP] {name:<25} {(ended - started) * 1000:9.1f}   {ended * 1000:12.1f}")
+
+startup_profile = StartupProfile()
+startup_profile.record("imports", _PROCESS_STARTED, time.perf_counter())
+
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+LLM_CACHE_SIZE = 256
+LLM_CACHE_TTL = 24 * 3600
+LLM_CACHE_PATH = os.path.join(BASE_PATH, "llm_cache.json")  # None keeps the cache in memory only
+NOTES_FLUSH_SECONDS = 2.0
+NOTES_FSYNC = "batch"  # "never", "batch" (a crash loses at most one batch) or "always"
+NOTES_MAX_BYTES = 1024 * 1024  # start a new notes file past this size
+NOTES_SPOKEN_ACK = True  # False stops saying "Noted" after every dictated line
+SCREENSHOT_MONITOR = "active"  # "active" (under the cursor), "all", or a 1-based monitor index
+SCREENSHOT_REGION = None  # (left, top, width, height) to always capture a fixed region
+SCREENSHOT_FORMAT = "png"  # "png", "bmp" (no compression) or "webp" (needs Pillow)
+SCREENSHOT_PNG_LEVEL = 1  # zlib level, 1 is several times faster than mss' default of 6
+SCREENSHOT_HIDE_MS = 150
+PHRASE_CACHE_DIR = os.path.join(BASE_PATH, "phrase_cache")  # None keeps clips in memory only
+PHRASE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+TRACE_JSONL_PATH = os.getenv("JARVIS_TRACE_LOG") or None  # e.g. latency_traces.jsonl; off unless set
+TRACE_JSONL_MAX_BYTES = 4 * 1024 * 1024  # rotate to <path>.1 past this size
+TRACE_JSONL_FLUSH_RECORDS = 50
+METRICS_PORT = 8765  # localhost-only /metrics endpoint, None disables it
+HEADLESS_ADDRESS = "127.0.0.1:8766"  # "host:port" or "unix:/path/to/socket" for --headless
+ASR_SERVICE_ADDRESS = "127.0.0.1:8767"
+ASR_WORKERS = os.cpu_count() or 1  # decode threads; vosk releases the GIL while decoding
+ASR_BLOCK_MS = 100
+ASR_STREAM_QUEUE_BLOCKS = 20  # per-stream backlog before the reader stops taking audio from the socket
+TRACE_STAGES = ("capture", "asr_final", "intent", "llm_first_token", "llm_done", "tts_start", "tts_end")
+TRACE_RESPONSE = "speech_end_to_audio"  # end-to-end histogram: end of speech to first audio
+
+class Tracer:
+    """Gives each utterance a trace ID and keeps rolling per-stage latency histograms.
+    Each stage is timed from the stage before it, and asr_final from the end of speech
+    (the last voiced frame), so a histogram shows that stage's own cost rather than how long
+    the user spoke. TRACE_RESPONSE covers end of speech to first audio. Only the first hit of
+    a stage per trace is counted. A trace's capture record is held back until a later stage is marked, so the opt-in JSONL
+    log never fills up with noise and other utterances that were discarded."""
+    def __init__(self, jsonl_path=TRACE_JSONL_PATH, window=500, max_traces=200,
+                 max_bytes=TRACE_JSONL_MAX_BYTES):
+        self.jsonl_path = jsonl_path
+        self.max_bytes = max_bytes
+        self.pending = {}
+        self.unflushed = 0
+        self.max_traces = max_traces
+        self.traces = OrderedDict()
+        self.histograms = {stage: deque(maxlen=window) for stage in TRACE_STAGES[1:] + (TRACE_RESPONSE,)}
+        self.current = None
+        self.lock = threading.Lock()
+        self.counter = 0
+        self.log_file = None
+        self.sources = {}
+
+    def add_source(self, name, stats):
+        """Include another component's stats() dict in the /metrics output"""
+        self.sources[name] = stats
+
+    def start(self):
+        with self.lock:
+            self.counter += 1
+            trace_id = f"{os.getpid():x}-{self.counter}"
+            self.traces[trace_id] = {}
+            while len(self.traces) > self.max_traces:
+                self.traces.popitem(last=False)
+        self.mark(trace_id, "capture")
+        return trace_id
+
+    def discard(self, trace_id):
+        with self.lock:
+            self.traces.pop(trace_id, None)
+            self.pending.pop(trace_id, None)
+
+    def age(self, trace_id, stage="capture"):
+        """Seconds since stage was marked on the trace, None if it never was"""
+        with self.lock:
+            at = self.traces.get(trace_id, {}).get(stage)
+        return time.perf_counter() - at if at is not None else None
+
+    def speech(self, trace_id):
+        """Note a voiced frame; the last one is the end of speech that asr_final is timed from"""
+        now = time.perf_counter()
+        with self.lock:
+            trace = self.traces.get(trace_id)
+            if trace is not None:
+                trace["speech_end"] = now
+
+    def adopt(self, trace_id, age, speech_age=None):
+        """Track a trace started in another process, captured age seconds ago, with its
+        last voiced frame speech_age seconds ago"""
+        if not trace_id:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            if trace_id not in self.traces:
+                self.traces[trace_id] = {"capture": now - (age or 0.0)}
+                if speech_age is not None:
+                    self.traces[trace_id]["speech_end"] = now - speech_age
+                while len(self.traces) > self.max_traces:
+                    self.traces.popitem(last=False)
+
+    def mark(self, trace_id, stage):
+        if not trace_id:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            trace = self.traces.get(trace_id)
+            if trace is None:
+                return
+            captured = trace.get("capture", now)
+            speech_end = trace.get("speech_end", captured)
+            if stage == "asr_final":
+                since = speech_end
+            else:
+                since = max((at for name, at in trace.items() if name != "speech_end"), default=now)
+            elapsed = (now - since) * 1000
+            first = False
+            if stage not in trace:
+                first = not any(name not in ("capture", "speech_end") for name in trace)
+                trace[stage] = now
+                if stage in self.histograms:
+                    self.histograms[stage].append(elapsed)
+                if stage == "tts_start":
+                    self.histograms[TRACE_RESPONSE].append((now - speech_end) * 1000)
+            if not self.jsonl_path:
+                return
+            record = {"trace": trace_id, "stage": stage, "ms": round(elapsed, 1),
+                      "total_ms": round((now - captured) * 1000, 1), "ts": time.time()}
+            if stage == "capture":
+                self.pending[trace_id] = record
+                while len(self.pending) > self.max_traces:
+                    self.pending.pop(next(iter(self.pending)))
+                return
+            self._log([self.pending.pop(trace_id), record] if trace_id in self.pending else [record], first)
+            if stage == TRACE_STAGES[-1] or self.unflushed >= TRACE_JSONL_FLUSH_RECORDS:
+                self._flush()
+
+    def _log(self, records, rotate=False):
+        """Append records, rotating the file to <path>.1 once it passes max_bytes.
+        Rotation only happens before a trace's first records, so a trace stays in one file."""
+        if not self.jsonl_path:
+            return
         try:
-            import comtypes.client
-            speaker = comtypes.client.CreateObject("SAPI.SpVoice")
-            speaker.Speak(text)
-            return True
+            if rotate and self.log_file is not None and self.max_bytes and self.log_file.tell() >= self.max_bytes:
+                self.log_file.close()
+                self.log_file = None
+                os.replace(self.jsonl_path, self.jsonl_path + ".1")
+            if self.log_file is None:
+                self.log_file = open(self.jsonl_path, 'a', encoding='utf-8')
+            self.log_file.write("".join(json.dumps(record) + "\n" for record in records))
+            self.unflushed += len(records)
         except Exception as e:
-            print(f"[TTS] Windows SAPI failed: {e}")
-            return False
+            print(f"[TRACE] Could not write {self.jsonl_path}: {e}")
+            self.jsonl_path = None
+
+    def _flush(self):
+        try:
+            if self.log_file is not None:
+                self.log_file.flush()
+        except Exception as e:
+            print(f"[TRACE] Could not write {self.jsonl_path}: {e}")
+        self.unflushed = 0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                stage: {
+                    "count": len(values),
+                    "p50_ms": round(percentile(values, 50), 1),
+                    "p95_ms": round(percentile(values, 95), 1),
+                }
+                for stage, values in self.histograms.items()
+            }
+
+    def summary(self):
+        lines = []
+        for stage, stats in self.snapshot().items():
+            if stats["count"]:
+                lines.append(f"{stage}: p50 {stats['p50_ms']:.0f} / p95 {stats['p95_ms']:.0f} ms")
+        return "\n".join(lines) or "No utterances traced yet"
+
+    def serve(self, port=METRICS_PORT):
+        """Expose the histograms as JSON on http://127.0.0.1:<port>/metrics"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                payload = dict(tracer.snapshot())
+                for name, stats in tracer.sources.items():
+                    payload[name] = stats()
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
 
-    def powershell_tts_method(self, text):
-        """Method 2: PowerShell TTS (most reliable)"""
         try:
-            clean_text = text.replace('"', '`"').replace("'", "`'")
-            ps_script = f'''
+            server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        except OSError as e:
+            print(f"[TRACE] Metrics endpoint unavailable on port {port}: {e}")
+            return None
+        server.daemon_threads = True
+        Thread(target=server.serve_forever, daemon=True).start()
+        print(f"[SYSTEM] Latency metrics at http://127.0.0.1:{port}/metrics")
+        return server
+
+tracer = Tracer()
+
+PRIORITY_SYSTEM = 0  # short acks such as "Noted" or "Yes sir?"
+PRIORITY_COMMAND = 1  # command confirmations
+PRIORITY_LLM = 2  # model prose, the first to be flushed
+
+class SpeechScheduler:
+    """Priority queue feeding tts_worker. Pending LLM prose can be flushed and the current
+    utterance cut short (barge-in), and an ack already waiting is not queued twice."""
+    def __init__(self):
+        self.heap = []
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.unfinished_tasks = 0
+        self.current = None
+        self.interrupted_at = None
+        self.merged = 0
+        self.generation = 0  # bumped when LLM prose is interrupted; older SpeechStreams go quiet
+
+    def put(self, item, priority=PRIORITY_COMMAND):
+        with self.cond:
+            if item is None:
+                # Shutdown jumps the queue.
+                priority = -1
+            else:
+                # Only short acks such as "Noted" are merged; repeated prose is real answer text.
+                text = item[0]
+                duplicate = priority == PRIORITY_SYSTEM and (
+                    any(entry[2] and entry[2][0] == text for entry in self.heap if entry[0] == priority)
+                    or (self.current and self.current[0] == priority and self.current[1][0] == text))
+                if duplicate:
+                    self.merged += 1
+                    return
+            heapq.heappush(self.heap, (priority, next(self.seq), item))
+            self.unfinished_tasks += 1
+            self.cond.notify()
+
+    def get(self):
+        """Block for the next item; returns (priority, item)"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.heap)
+            priority, _, item = heapq.heappop(self.heap)
+            self.current = (priority, item) if item is not None else None
+            return priority, item
+
+    def task_done(self):
+        with self.cond:
+            self.unfinished_tasks -= 1
+            self.current = None
+            if self.interrupted_at is not None:
+                log_metric("Speech interrupt latency", (time.perf_counter() - self.interrupted_at) * 1000)
+                self.interrupted_at = None
+
+    def interrupt(self, min_priority=PRIORITY_LLM):
+        """Drop pending speech at min_priority or below and stop the current utterance if it is one"""
+        with self.cond:
+            kept = [entry for entry in self.heap if entry[2] is None or entry[0] < min_priority]
+            flushed = len(self.heap) - len(kept)
+            if flushed:
+                self.heap = kept
+                heapq.heapify(self.heap)
+                self.unfinished_tasks -= flushed
+            stop_current = self.current is not None and self.current[0] >= min_priority
+            if stop_current:
+                self.interrupted_at = time.perf_counter()
+            if min_priority <= PRIORITY_LLM:
+                self.generation += 1
+        if stop_current:
+            tts_engine.stop()
+        return flushed, stop_current
+
+speech_queue = SpeechScheduler()
+
+def pcm_to_wav(pcm, sample_rate, channels=1, sample_width=2):
+    import io
+    import wave
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+def play_wav_bytes(audio):
+    """Play a WAV clip from memory, blocking until it ends or stop_wav_playback() is called"""
+    import winsound
+    winsound.PlaySound(audio, winsound.SND_MEMORY | winsound.SND_NODEFAULT)
+
+def stop_wav_playback():
+    if os.name == 'nt':
+        import winsound
+        winsound.PlaySound(None, 0)
+
+class TTSBackend:
+    """A speech engine that is started once and kept warm for every utterance"""
+    name = "base"
+    voice_name = "default"
+    cache_phrases = True  # False for engines whose clips are not worth keeping in the phrase cache
+
+    def __init__(self):
+        self.started = False
+
+    def ensure_started(self):
+        if not self.started:
+            self.start()
+            self.started = True
+
+    def start(self):
+        pass
+
+    def speak(self, text):
+        raise NotImplementedError
+
+    def synthesize(self, text):
+        """Render text to an audio clip for the phrase cache, or None if this engine can't.
+        Called on a separate instance from the one that speaks."""
+        return None
+
+    def play(self, audio):
+        """Play a clip returned by synthesize()"""
+        raise NotImplementedError
+
+    def stop(self):
+        """Cut the utterance in progress short; called from another thread"""
+        pass
+
+    def close(self):
+        self.started = False
+
+class SapiBackend(TTSBackend):
+    """Windows built-in TTS using one SAPI voice object"""
+    name = "sapi"
+
+    def start(self):
+        import comtypes
+        import comtypes.client
+        comtypes.CoInitialize()
+        self.voice = comtypes.client.CreateObject("SAPI.SpVoice")
+        self.voice_name = self.voice.Voice.GetDescription()
+        self.stop_event = threading.Event()
+
+    def speak(self, text):
+        self.stop_event.clear()
+        self.voice.Speak(text, 1)  # SVSFlagsAsync
+        while not self.voice.WaitUntilDone(50):
+            if self.stop_event.is_set():
+                self.voice.Speak("", 3)  # SVSFlagsAsync | SVSFPurgeBeforeSpeak
+                break
+
+    def synthesize(self, text):
+        import comtypes.client
+        stream = comtypes.client.CreateObject("SAPI.SpMemoryStream")
+        audio_format = stream.Format
+        audio_format.Type = 22  # SAFT22kHz16BitMono
+        stream.Format = audio_format
+        self.voice.AudioOutputStream = stream
+        self.voice.Speak(text, 0)
+        return pcm_to_wav(bytes(stream.GetData()), 22050)
+
+    def play(self, audio):
+        play_wav_bytes(audio)
+
+    def stop(self):
+        self.stop_event.set()
+        stop_wav_playback()
+
+class PowerShellBackend(TTSBackend):
+    """One long-lived PowerShell System.Speech synthesizer fed line by line over stdin.
+    Every line starts with a verb, "say " or "wav ", so spoken text can never read as a command."""
+    name = "powershell"
+    SCRIPT = '''
+$utf8 = New-Object System.Text.UTF8Encoding $false
+[Console]::InputEncoding = $utf8
+[Console]::OutputEncoding = $utf8
 Add-Type -AssemblyName System.speech
 $speak = New-Object System.Speech.Synthesis.SpeechSynthesizer
 $speak.Volume = 100
 $speak.Rate = 1
-$speak.Speak("{clean_text}")
+[Console]::Out.WriteLine("ready")
+while (($line = [Console]::In.ReadLine()) -ne $null) {
+    if ($line.StartsWith("wav ")) {
+        $stream = New-Object System.IO.MemoryStream
+        $speak.SetOutputToWaveStream($stream)
+        $speak.Speak($line.Substring(4))
+        $speak.SetOutputToDefaultAudioDevice()
+        [Console]::Out.WriteLine([Convert]::ToBase64String($stream.ToArray()))
+        continue
+    }
+    $speak.Speak($line.Substring(4))
+    [Console]::Out.WriteLine("done")
+}
 '''
-            result = subprocess.run([
-                "powershell", "-Command", ps_script
-            ], capture_output=True, text=True, timeout=30, creationflags=subprocess.CREATE_NO_WINDOW)
-            return True
-        except Exception as e:
-            print(f"[TTS] PowerShell failed: {e}")
+
+    def start(self):
+        self.proc = subprocess.Popen(
+            ["powershell", "-NoProfile", "-NonInteractive", "-Command", self.SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        )
+        if self.proc.stdout.readline().strip() != "ready":
+            self.close()
+            raise RuntimeError("System.Speech synthesizer did not start")
+
+    def speak(self, text):
+        if self.proc.poll() is not None:
+            self.start()
+        self.interrupted = False
+        self.proc.stdin.write("say " + " ".join(text.split()) + "\n")
+        self.proc.stdin.flush()
+        if not self.proc.stdout.readline() and not self.interrupted:
+            raise RuntimeError("PowerShell synthesizer exited")
+
+    def synthesize(self, text):
+        import base64
+        self.proc.stdin.write("wav " + " ".join(text.split()) + "\n")
+        self.proc.stdin.flush()
+        line = self.proc.stdout.readline().strip()
+        if not line:
+            raise RuntimeError("PowerShell synthesizer exited")
+        return base64.b64decode(line)
+
+    def play(self, audio):
+        play_wav_bytes(audio)
+
+    def stop(self):
+        stop_wav_playback()
+        # System.Speech cannot be cancelled from outside a blocking Speak(), so the
+        # synthesizer is killed and restarted on the next utterance.
+        self.interrupted = True
+        proc = getattr(self, "proc", None)
+        if proc and proc.poll() is None:
+            proc.kill()
+
+    def close(self):
+        super().close()
+        proc = getattr(self, "proc", None)
+        if proc and proc.poll() is None:
+            proc.kill()
+
+class EdgeTTSBackend(TTSBackend):
+    """edge-tts (online) on one persistent asyncio loop, streamed into one long-lived player.
+
+    Audio chunks are written to the player's stdin as they arrive, so playback starts on the
+    first chunk. The end of playback is estimated from the bytes written and the bitrate.
+    chunk_source (an async generator function of text) and player_cmd can be swapped out."""
+    name = "edge"
+    VOICE = "en-US-AriaNeural"
+    voice_name = VOICE
+    BITRATE = 48000  # edge-tts default format: audio-24khz-48kbitrate-mono-mp3
+    TAIL_SECONDS = 0.15  # decoder and device latency after the last byte is due
+    CHUNK_TIMEOUT = 10.0  # longest wait for the first or any later audio chunk
+    PLAYER = ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-f", "mp3", "-i", "-"]
+
+    def __init__(self, chunk_source=None, player_cmd=None):
+        super().__init__()
+        self.chunk_source = chunk_source or self._edge_chunks
+        self.player_cmd = player_cmd or self.PLAYER
+        self.player = None
+        self.playing_until = 0.0
+        self.first_audio_at = None
+        self.future = None
+
+    def start(self):
+        import asyncio
+        self.asyncio = asyncio
+        if self.chunk_source == self._edge_chunks:
+            import edge_tts
+            self.edge_tts = edge_tts
+        if not shutil.which(self.player_cmd[0]):
+            raise RuntimeError(f"{self.player_cmd[0]} not found")
+        self.loop = asyncio.new_event_loop()
+        self.stop_event = threading.Event()
+        Thread(target=self.loop.run_forever, daemon=True).start()
+
+    async def _edge_chunks(self, text):
+        async for chunk in self.edge_tts.Communicate(text, self.VOICE).stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+    def _write(self, data):
+        """Queue audio on the player, starting it if needed; False once stopped"""
+        if self.stop_event.is_set():
             return False
+        if self.player is None or self.player.poll() is not None:
+            self.player = subprocess.Popen(
+                self.player_cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            )
+        now = time.monotonic()
+        if self.first_audio_at is None:
+            self.first_audio_at = now
+        self.playing_until = max(now, self.playing_until) + len(data) * 8 / self.BITRATE
+        try:
+            self.player.stdin.write(data)
+            self.player.stdin.flush()
+        except (OSError, AttributeError):
+            return False  # killed by stop()
+        return True
 
-    def edge_tts_method(self, text):
-        """Method 3: Use edge-tts (online)"""
+    async def _chunks(self, text):
+        """chunk_source with a deadline per chunk, so long texts are not cut off by a total timeout"""
+        chunks = self.chunk_source(text)
         try:
-            import asyncio
-            import edge_tts
+            while True:
+                try:
+                    yield await self.asyncio.wait_for(chunks.__anext__(), self.CHUNK_TIMEOUT)
+                except StopAsyncIteration:
+                    return
+        finally:
+            await chunks.aclose()
 
-            async def generate_speech():
-                communicate = edge_tts.Communicate(text, "en-US-AriaNeural")
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-                    tmp_path = tmp_file.name
+    async def _stream(self, text):
+        async for data in self._chunks(text):
+            if not self._write(data):
+                break
 
-                await communicate.save(tmp_path)
+    async def _collect(self, text):
+        return b"".join([data async for data in self._chunks(text)])
 
-                if os.name == 'nt':
-                    os.system(f'start wmplayer "{tmp_path}" /play /close')
-                else:
-                    os.system(f'ffplay -autoexit -nodisp "{tmp_path}"')
+    def _run(self, coroutine):
+        import concurrent.futures
+        self.future = self.asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        try:
+            return self.future.result()
+        except concurrent.futures.CancelledError:
+            return None  # stop()
+        except BaseException:
+            self.future.cancel()
+            raise
 
-                time.sleep(2)
-                os.unlink(tmp_path)
+    def _wait_playback(self):
+        self.stop_event.wait(max(0.0, self.playing_until - time.monotonic()) + self.TAIL_SECONDS)
 
-            import threading
-            def run_async():
-                asyncio.new_event_loop().run_until_complete(generate_speech())
+    def speak(self, text):
+        self.stop_event.clear()
+        self.first_audio_at = None
+        self._run(self._stream(text))
+        self._wait_playback()
+
+    def synthesize(self, text):
+        return self._run(self._collect(text))
+
+    def play(self, audio):
+        self.stop_event.clear()
+        self.first_audio_at = None
+        self._write(audio)
+        self._wait_playback()
+
+    def _kill_player(self):
+        player, self.player = self.player, None
+        self.playing_until = 0.0
+        if player and player.poll() is None:
+            player.kill()
+
+    def stop(self):
+        # The player has already buffered audio, so it is killed and restarted on the next write.
+        self.stop_event.set()
+        if self.future:
+            self.future.cancel()
+        self._kill_player()
+
+    def close(self):
+        super().close()
+        self._kill_player()
+        loop = getattr(self, "loop", None)
+        if loop:
+            loop.call_soon_threadsafe(loop.stop)
+
+class PrintBackend(TTSBackend):
+    """Final fallback - just print"""
+    name = "print"
+    cache_phrases = False
 
-            thread = threading.Thread(target=run_async)
-            thread.daemon = True
-            thread.start()
-            thread.join(timeout=10)
-            return True
+    def speak(self, text):
+        print(f"[SPEECH]: {text}")
 
+class FakeTTSBackend(TTSBackend):
+    """Silent backend that simulates synthesis time, for benchmarks on machines without audio"""
+    name = "fake"
+    cache_phrases = False
+
+    def __init__(self, seconds_per_char=0.0, synthesis_delay=0.0):
+        super().__init__()
+        self.seconds_per_char = seconds_per_char
+        self.synthesis_delay = synthesis_delay
+        self.spoken = []
+        self.stop_event = threading.Event()
+
+    def speak(self, text):
+        self.play(self.synthesize(text))
+
+    def synthesize(self, text):
+        time.sleep(self.synthesis_delay)
+        return text.encode("utf-8")
+
+    def play(self, audio):
+        text = audio.decode("utf-8")
+        self.spoken.append((time.perf_counter(), text))
+        self.stop_event.clear()
+        self.stop_event.wait(len(text) * self.seconds_per_char)
+
+    def stop(self):
+        self.stop_event.set()
+
+TTS_BACKENDS = {
+    "sapi": SapiBackend,
+    "powershell": PowerShellBackend,
+    "edge": EdgeTTSBackend,
+    "print": PrintBackend,
+    "fake": FakeTTSBackend,
+}
+TTS_BACKEND_ORDER = os.getenv("JARVIS_TTS_BACKENDS", "sapi,powershell,edge,print")
+
+def literal_phrases(path=None):
+    """Every string literal passed straight to speak() in this file"""
+    import ast
+    try:
+        with open(path or __file__, encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError):
+        return []
+    phrases = []
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "speak"
+                and node.args and isinstance(node.args[0], ast.Constant)
+                and isinstance(node.args[0].value, str) and node.args[0].value not in phrases):
+            phrases.append(node.args[0].value)
+    return phrases
+
+class PhraseAudioCache:
+    """Synthesized clips of fixed phrases keyed by (text, voice, backend), held in memory and
+    persisted one file per clip; the least recently played clips go once max_bytes is exceeded.
+    Only the phrases (by default literal_phrases(), read once) are ever looked up."""
+    def __init__(self, directory=PHRASE_CACHE_DIR, max_bytes=PHRASE_CACHE_MAX_BYTES, phrases=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.phrases = phrases
+        self.phrase_set = None
+        self.clips = OrderedDict()
+        self.lock = threading.Lock()
+        self.filled = set()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text, backend):
+        import hashlib
+        raw = f"{backend.name}\n{backend.voice_name}\n{text}".encode("utf-8")
+        return hashlib.sha1(raw).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".clip")
+
+    def phrase_list(self):
+        if self.phrases is None:
+            self.phrases = literal_phrases()
+        return self.phrases
+
+    def covers(self, text):
+        """True for the fixed phrases the cache holds clips of; anything else is never looked up"""
+        if self.phrase_set is None:
+            self.phrase_set = frozenset(self.phrase_list())
+        return text in self.phrase_set
+
+    def get(self, text, backend):
+        key = self.key(text, backend)
+        with self.lock:
+            audio = self.clips.get(key)
+            if audio is not None:
+                self.clips.move_to_end(key)
+        if audio is not None and self.directory:
+            # Disk eviction goes by mtime, so clips played from memory must look recent there too.
+            try:
+                os.utime(self._path(key))
+            except OSError:
+                pass
+        elif audio is None and self.directory:
+            try:
+                with open(self._path(key), "rb") as f:
+                    audio = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                pass
+            if audio is not None:
+                with self.lock:
+                    self.clips[key] = audio
+        with self.lock:
+            if audio is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return audio
+
+    def put(self, text, backend, audio):
+        key = self.key(text, backend)
+        with self.lock:
+            self.clips[key] = audio
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        with self.lock:
+            total = sum(len(audio) for audio in self.clips.values())
+            while total > self.max_bytes and self.clips:
+                total -= len(self.clips.popitem(last=False)[1])
+        if not self.directory:
+            return
+        try:
+            files = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                     if name.endswith(".clip")]
+            files = sorted((os.stat(path).st_mtime, os.path.getsize(path), path) for path in files)
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self.lock:
+                self.clips.pop(os.path.basename(path)[:-len(".clip")], None)
+
+    def fill_async(self, backend, phrases=None):
+        """Synthesize the missing phrases for backend's engine and voice on a background thread"""
+        if not backend.cache_phrases:
+            return
+        with self.lock:
+            if backend.name in self.filled:
+                return
+            self.filled.add(backend.name)
+        Thread(target=self.fill, args=(backend, phrases), daemon=True).start()
+
+    def fill(self, backend, phrases=None):
+        phrases = self.phrase_list() if phrases is None else phrases
+        renderer = type(backend)()
+        added = 0
+        try:
+            renderer.ensure_started()
+            for text in phrases:
+                if self.get(text, backend) is not None:
+                    continue
+                audio = renderer.synthesize(text)
+                if audio is None:
+                    return
+                self.put(text, backend, audio)
+                added += 1
         except Exception as e:
-            print(f"[TTS] Edge-TTS failed: {e}")
-            return False
+            print(f"[TTS] Phrase cache fill stopped: {e}")
+        finally:
+            renderer.close()
+        print(f"[TTS] Phrase cache ready for {backend.name}: {added} new of {len(phrases)} phrases")
 
-    def print_only_method(self, text):
-        """Method 4: Final fallback - just print"""
-        print(f"[SPEECH]: {text}")
-        return True
+class GuaranteedTTS:
+    def __init__(self, backends=None, phrase_cache=None):
+        if backends is None:
+            backends = [TTS_BACKENDS[name.strip()]() for name in TTS_BACKEND_ORDER.split(",") if name.strip()]
+        self.backends = backends
+        self.phrase_cache = phrase_cache
+        self.active = None
+        self.failed = set()
+        self.latencies = []
 
     def speak(self, text):
-        """Try all methods until one works"""
+        """Use the remembered backend, falling through the rest only when it fails"""
         if not text or not text.strip():
             return False
 
         print(f"[ASSISTANT]: {text}")
 
-        for method in self.methods:
-            if method(text):
-                return True
+        candidates = [self.active] if self.active else []
+        candidates += [b for b in self.backends if b is not self.active and b not in self.failed]
+        for backend in candidates:
+            try:
+                backend.ensure_started()
+                started = time.perf_counter()
+                clip = None
+                if self.phrase_cache and backend.cache_phrases and self.phrase_cache.covers(text):
+                    clip = self.phrase_cache.get(text, backend)
+                if clip is not None:
+                    backend.play(clip)
+                else:
+                    backend.speak(text)
+            except Exception as e:
+                print(f"[TTS] {backend.name} failed: {e}")
+                self.failed.add(backend)
+                backend.close()
+                if backend is self.active:
+                    self.active = None
+                continue
+
+            if backend is not self.active:
+                print(f"[TTS] Using {backend.name} backend")
+                self.active = backend
+                if self.phrase_cache:
+                    self.phrase_cache.fill_async(backend)
+            self.latencies = self.latencies[-199:] + [(time.perf_counter() - started) * 1000]
+            return True
         return False
 
-tts_engine = GuaranteedTTS()
+    def stop(self):
+        if self.active:
+            self.active.stop()
+
+phrase_cache = PhraseAudioCache()
+tts_engine = GuaranteedTTS(phrase_cache=phrase_cache)
+
+speech_observers = []  # callables (event, text, trace_id), told when an utterance is "speech" and "spoken"
 
 def tts_worker():
     """TTS worker thread"""
     while True:
-        text = speech_queue.get()
-        if text is None:
+        priority, item = speech_queue.get()
+        if item is None:
             break
+        text, trace_id = item
+        tracer.mark(trace_id, "tts_start")
+        for observer in speech_observers:
+            observer("speech", text, trace_id)
         tts_engine.speak(text)
+        tracer.mark(trace_id, "tts_end")
+        for observer in speech_observers:
+            observer("spoken", text, trace_id)
         speech_queue.task_done()
 
-tts_thread = Thread(target=tts_worker, daemon=True)
-tts_thread.start()
+tts_thread = None
+
+def start_tts():
+    """Start the TTS worker; speak() only queues until this runs"""
+    global tts_thread
+    if tts_thread is None:
+        tts_thread = Thread(target=tts_worker, daemon=True)
+        tts_thread.start()
 
-def speak(text):
+def speak(text, trace_id=None, priority=PRIORITY_COMMAND):
     """Safely add text to speech queue"""
     if text and text.strip():
-        speech_queue.put(text)
+        speech_queue.put((text, trace_id or tracer.current), priority)
         return True
     return False
 
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+|\n+')
+CLAUSE_END = re.compile(r'[,;:]\s+')
+
+# Intent table: (priority, name, pattern, JarvisApp handler, light up the glow).
+# Patterns are anchored at the start of the utterance; use ".*" for "anywhere in".
+# Lower priority numbers are tried first, and named groups become handler keyword arguments.
+INTENTS = [
+    (0, "sleep", r".*(?:stop listening|go to sleep)", "go_to_sleep", False),
+    (5, "stop_speaking", r"(?:stop|stop talking|be quiet|quiet|shut up|enough|cancel)$", "stop_speaking", False),
+    (10, "search", r"(?:search for |search |google )(?P<query>.*)", "open_chrome_search", True),
+    (20, "new_tab", r"(?:new tab|open tab|open new tab)$", "open_chrome_search", False),
+    (30, "open_chrome", r"(?:.*open chrome|chrome$|open browser$)", "open_chrome_search", True),
+    (40, "close_chrome", r"(?:.*close chrome|close browser$)", "close_chrome", False),
+    (50, "youtube", r".*youtube", "open_youtube", True),
+    (60, "spotify_search", r"(?:search spotify for |spotify search )(?P<query>.*)", "open_spotify", True),
+    (61, "spotify_play", r"play (?P<query>.*) on spotify", "open_spotify", True),
+    (70, "open_spotify", r"(?:.*open spotify|spotify$)", "open_spotify", True),
+    (80, "close_spotify", r".*close spotify", "close_spotify", False),
+    (90, "open_notes", r".*(?:open notes|start notes|take notes)", "open_notes", False),
+    (100, "time", r"(?:.*(?:what time|tell me the time)|time$)", "tell_time", False),
+    (105, "screenshot_all", r".*screenshot.*\b(?:all|every|both) (?:monitors|screens|displays)", "take_screenshot_all", False),
+    (110, "screenshot", r".*screenshot", "take_screenshot", False),
+    (120, "hide", r".*(?:" + "|".join(re.escape(cmd) for cmd in HIDE_COMMANDS) + ")", "minimize_to_tray", False),
+]
+
+class IntentRouter:
+    """Compiles the intent table into a single regex so each utterance is matched in one pass"""
+    def __init__(self, intents):
+        self.intents = {}
+        alternatives = []
+        for index, (priority, name, pattern, handler, activate) in enumerate(sorted(intents, key=lambda row: row[0])):
+            key = f"i{index}"
+            pattern = re.sub(r"\(\?P<(\w+)>", lambda m: f"(?P<{key}_{m.group(1)}>", pattern)
+            alternatives.append(f"(?P<{key}>{pattern})")
+            self.intents[key] = (name, handler, activate)
+        self.regex = re.compile("|".join(alternatives), re.DOTALL)
+
+    def match(self, text):
+        """Return (name, handler, activate, slots) for the best intent, or None"""
+        m = self.regex.match(text)
+        if not m:
+            return None
+        key = m.lastgroup
+        name, handler, activate = self.intents[key]
+        prefix = key + "_"
+        slots = {k[len(prefix):]: v.strip() for k, v in m.groupdict().items() if k.startswith(prefix) and v is not None}
+        return name, handler, activate, slots
+
+intent_router = IntentRouter(INTENTS)
+
+def clean_markdown(text):
+    """Strip the markdown Gemma likes to emit so it is not read out loud"""
+    text = re.sub(r'^\s*(?:[-+•]|#+)\s+', '', text, flags=re.MULTILINE)
+    text = text.replace("**", "").replace("__", "").replace("*", "").replace("`", "").replace("#", "")
+    return " ".join(text.split())
+
+class SentenceChunker:
+    """Cuts streamed LLM text at sentence (or, for long runs, clause) boundaries"""
+    def __init__(self, min_chars=12, clause_chars=80):
+        self.min_chars = min_chars
+        self.clause_chars = clause_chars
+        self.buffer = ""
+
+    def _find_cut(self):
+        for match in SENTENCE_END.finditer(self.buffer):
+            if match.group().startswith("\n") or match.start() >= self.min_chars:
+                return match.end()
+        if len(self.buffer) >= self.clause_chars:
+            cut = None
+            for match in CLAUSE_END.finditer(self.buffer):
+                if match.start() >= self.min_chars:
+                    cut = match.end()
+            return cut
+        return None
+
+    def feed(self, text):
+        """Add streamed text, return the chunks that are complete"""
+        self.buffer += text
+        chunks = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            chunk = clean_markdown(self.buffer[:cut])
+            self.buffer = self.buffer[cut:]
+            if chunk:
+                chunks.append(chunk)
+        return chunks
+
+    def flush(self):
+        chunk = clean_markdown(self.buffer)
+        self.buffer = ""
+        return chunk
+
+class SpeechStream:
+    """Speaks an LLM answer chunk by chunk while it is still being generated"""
+    def __init__(self, trace_id=None):
+        self.chunker = SentenceChunker()
+        self.started = time.perf_counter()
+        self.chunks_spoken = 0
+        self.trace_id = trace_id
+        self.generation = speech_queue.generation
+
+    def _say(self, chunk):
+        if self.generation != speech_queue.generation:
+            return  # barged in on; tokens still in flight must not be spoken
+        if speak(chunk, self.trace_id, PRIORITY_LLM) and self.chunks_spoken == 0:
+            log_metric("LLM time to first speech", (time.perf_counter() - self.started) * 1000)
+        self.chunks_spoken += 1
+
+    def feed(self, token):
+        for chunk in self.chunker.feed(token):
+            self._say(chunk)
+
+    def finish(self, response):
+        """Speak what is left; answers that never streamed (errors) are spoken whole"""
+        rest = self.chunker.flush()
+        if self.chunks_spoken == 0:
+            rest = clean_markdown(response or "")
+        if rest:
+            self._say(rest)
+
 vosk_model_path = os.path.join(BASE_PATH, "vosk-model-small-en-us-0.15")
 
-if not os.path.exists(vosk_model_path):
-    print(f"CRITICAL ERROR: Vosk model not found at {vosk_model_path}")
-    print("Please download it from https://alphacephei.com/vosk/models and extract it here.")
-    sys.exit(1)
+model = None
+model_ready = threading.Event()
 
-model = vosk.Model(vosk_model_path)
-print("[SYSTEM] Vosk model loaded successfully")
+def check_model_path():
+    if not os.path.exists(vosk_model_path):
+        print(f"CRITICAL ERROR: Vosk model not found at {vosk_model_path}")
+        print("Please download it from https://alphacephei.com/vosk/models and extract it here.")
+        sys.exit(1)
+
+def load_model():
+    """Load the Vosk model once; safe to call from a background thread"""
+    global model
+    if model is None:
+        try:
+            with startup_profile.stage("vosk import"):
+                import vosk
+            with startup_profile.stage("vosk model"):
+                model = vosk.Model(vosk_model_path)
+            print("[SYSTEM] Vosk model loaded successfully")
+        except Exception as e:
+            print(f"[SYSTEM] Vosk model failed to load: {e}")
+        finally:
+            model_ready.set()
+    return model
+
+def wait_for_model():
+    model_ready.wait()
+    return model
+
+def split_wake_command(text):
+    """The words after the last wake word, or None when there is no wake word"""
+    words = text.split()
+    if WAKE_WORD not in words:
+        return None
+    return " ".join(words[len(words) - words[::-1].index(WAKE_WORD):])
+
+class WakeWordDetector:
+    """Spots the wake word in partial results of a recognizer limited to a tiny grammar"""
+    def __init__(self, model, sample_rate=SAMPLE_RATE, debounce=WAKE_DEBOUNCE_SECONDS):
+        import vosk
+        grammar = [WAKE_WORD] + WAKE_PHRASES + ["[unk]"]
+        self.recognizer = vosk.KaldiRecognizer(model, sample_rate, json.dumps(grammar))
+        self.debounce = debounce
+        self.fired = False
+        self.last_fired = 0.0
+        self.final_text = None
+        self.unknown_words = 0
+
+    def _text(self, words):
+        self.unknown_words = words.count("[unk]")
+        return " ".join(w for w in words if w != "[unk]")
+
+    def accept(self, data):
+        """Feed audio; True the first time the wake word shows up in an utterance"""
+        if self.recognizer.AcceptWaveform(data):
+            words = json.loads(self.recognizer.Result()).get("text", "").split()
+            end_of_utterance = True
+        else:
+            words = json.loads(self.recognizer.PartialResult()).get("partial", "").split()
+            end_of_utterance = False
+
+        now = time.monotonic()
+        hit = WAKE_WORD in words and not self.fired and now - self.last_fired >= self.debounce
+        if hit:
+            self.fired = True
+            self.last_fired = now
+        if end_of_utterance:
+            self.fired = False
+        self.final_text = self._text(words) if end_of_utterance else None
+        return hit
+
+    def end_utterance(self):
+        """Close the utterance and return its grammar-limited text"""
+        words = json.loads(self.recognizer.FinalResult()).get("text", "").split()
+        self.fired = False
+        return self._text(words)
+
+class EnergyVAD:
+    """Energy gate with an adaptive noise floor, hangover and pre-roll, so the decoder skips silence"""
+    def __init__(self, sample_rate=SAMPLE_RATE, hangover_ms=VAD_HANGOVER_MS, preroll_ms=VAD_PREROLL_MS,
+                 ratio=3.0, min_rms=300):
+        self.sample_rate = sample_rate
+        self.hangover_ms = hangover_ms
+        self.preroll_ms = preroll_ms
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.noise_floor = None
+        self.preroll = deque()
+        self.in_speech = False
+        self.voiced = False  # whether the last processed frame was speech
+        self.hangover_left = 0.0
+        self.frames_decoded = 0
+        self.frames_skipped = 0
+
+    @staticmethod
+    def rms(data):
+        samples = array('h')
+        samples.frombytes(data[:len(data) - len(data) % 2])
+        if sys.byteorder == "big":
+            samples.byteswap()
+        if not samples:
+            return 0.0
+        return math.sqrt(sum(x * x for x in samples) / len(samples))
+
+    def _ms(self, data):
+        return len(data) / 2 / self.sample_rate * 1000
+
+    def process(self, data):
+        """Return (blocks to decode, True when a speech segment just ended)"""
+        level = self.rms(data)
+        if self.noise_floor is None:
+            self.noise_floor = level
+        voiced = self.voiced = level > max(self.min_rms, self.noise_floor * self.ratio)
+        if not voiced:
+            if level < self.noise_floor:
+                self.noise_floor = level
+            else:
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * level
+
+        frames = len(data) // 2
+        if voiced:
+            blocks = [data]
+            if not self.in_speech:
+                blocks = list(self.preroll) + blocks
+                for block in self.preroll:
+                    self.frames_skipped -= len(block) // 2
+                    self.frames_decoded += len(block) // 2
+                self.preroll.clear()
+            self.in_speech = True
+            self.hangover_left = self.hangover_ms
+            self.frames_decoded += frames
+            return blocks, False
+
+        if self.in_speech:
+            self.hangover_left -= self._ms(data)
+            self.frames_decoded += frames
+            if self.hangover_left > 0:
+                return [data], False
+            self.in_speech = False
+            return [data], True
+
+        self.preroll.append(data)
+        self.frames_skipped += frames
+        while sum(self._ms(block) for block in self.preroll) > self.preroll_ms and len(self.preroll) > 1:
+            self.preroll.popleft()
+        return [], False
+
+    def report(self):
+        total = self.frames_decoded + self.frames_skipped
+        if total:
+            log_metric("VAD audio decoded", self.frames_decoded / self.sample_rate, "s")
+            log_metric("VAD audio skipped", self.frames_skipped / self.sample_rate, "s")
+            log_metric("VAD skip ratio", 100.0 * self.frames_skipped / total, "%")
+
+class VoicePipeline:
+    """Runs audio through the wake detector and the full recognizer and returns events.
+
+    In the low-cost "wake" mode (asleep, or idle until the wake word) only the tiny-grammar
+    recognizer runs; both recognizers stay loaded, so switching back to "full" is free."""
+    def __init__(self, model, sample_rate=SAMPLE_RATE, vad=VAD_ENABLED, low_cost=False):
+        import vosk
+        self.sample_rate = sample_rate
+        self.recognizer = vosk.KaldiRecognizer(model, sample_rate)
+        self.wake_detector = WakeWordDetector(model, sample_rate)
+        self.vad = EnergyVAD(sample_rate) if vad else None
+        self.woken = False
+        self.trace_id = None
+        self.mode = self.requested_mode = "wake" if low_cost else "full"
+        self.replay = deque()
+        self.replay_bytes = 0
+        self.replay_max_bytes = int(sample_rate * WAKE_REPLAY_MS / 1000) * 2
+        self.cpu_seconds = {"full": 0.0, "wake": 0.0}
+        self.audio_seconds = {"full": 0.0, "wake": 0.0}
+
+    def set_low_cost(self, enabled):
+        """Ask for the wake-only path; safe from any thread, applied on the next feed()"""
+        self.requested_mode = "wake" if enabled else "full"
+
+    def _clear_replay(self):
+        self.replay.clear()
+        self.replay_bytes = 0
+
+    def _switch(self, mode):
+        self._clear_replay()
+        self.wake_detector.end_utterance()
+        self.recognizer.FinalResult()
+        self.woken = False
+        tracer.discard(self.trace_id)
+        self.trace_id = None
+        self.mode = mode
+        print(f"[SYSTEM] Recognizer mode: {mode}")
+
+    def _wake_final(self, text, events):
+        # The tiny grammar forces everything onto its few words, so only a clean, exact phrase
+        # counts. The app decides whether to leave wake-only mode (it does so when it wakes up).
+        trace_id, self.trace_id = self.trace_id, None
+        if text in WAKE_PHRASES and not self.wake_detector.unknown_words:
+            print(f"[USER]: {text}")
+            tracer.mark(trace_id, "asr_final")
+            events.append(("text", text, trace_id))
+        else:
+            tracer.discard(trace_id)
+
+    def _decode_wake(self, data, events):
+        if self.trace_id is None:
+            self.trace_id = tracer.start()
+        self.replay.append(data)
+        self.replay_bytes += len(data)
+        while self.replay_bytes > self.replay_max_bytes and len(self.replay) > 1:
+            self.replay_bytes -= len(self.replay.popleft())
+
+        if self.wake_detector.accept(data):
+            # Go full right away so a command following the wake word is not lost while the
+            # UI thread catches up; the app only ever starts listening after a wake event.
+            # The utterance so far is replayed so the full recognizer hears "jarvis <command>".
+            self.woken = True
+            self.mode = self.requested_mode = "full"
+            events.append(("wake", self.trace_id))
+            replay = list(self.replay)
+            self._clear_replay()
+            for block in replay:
+                if self.recognizer.AcceptWaveform(block):
+                    self._final(self.recognizer.Result(), events)
+        elif self.wake_detector.final_text is not None:
+            self._clear_replay()
+            self._wake_final(self.wake_detector.final_text, events)
+
+    def _final(self, result, events):
+        text_data = json.loads(result).get("text", "").lower().strip()
+        woken, self.woken = self.woken, False
+        trace_id, self.trace_id = self.trace_id, None
+
+        if text_data:
+            print(f"[USER]: {text_data}")
+            tracer.mark(trace_id, "asr_final")
+
+        if woken or WAKE_WORD in text_data:
+            # "jarvis <command>" in one breath: hand over whatever followed the wake word.
+            command = split_wake_command(text_data)
+            if command is None:
+                command = "" if WAKE_WORD in text_data else text_data
+            events.append(("wake_command", command, trace_id))
+        elif text_data:
+            events.append(("text", text_data, trace_id))
+        else:
+            tracer.discard(trace_id)
+
+    def _decode(self, data, events):
+        if self.trace_id is None:
+            self.trace_id = tracer.start()
+        if self.wake_detector.accept(data):
+            self.woken = True
+            events.append(("wake", self.trace_id))
+
+        if self.recognizer.AcceptWaveform(data):
+            self._final(self.recognizer.Result(), events)
+
+    def feed(self, data):
+        if self.requested_mode != self.mode:
+            self._switch(self.requested_mode)
+        mode = self.mode
+        started = time.thread_time()
+        events = []
+        decode = self._decode_wake if mode == "wake" else self._decode
+        if not self.vad:
+            decode(data, events)
+        else:
+            blocks, speech_ended = self.vad.process(data)
+            for block in blocks:
+                decode(block, events)
+            if self.vad.voiced:
+                tracer.speech(self.trace_id)
+            if speech_ended:
+                events += self.flush()
+        self.cpu_seconds[mode] += time.thread_time() - started
+        self.audio_seconds[mode] += len(data) / 2 / self.sample_rate
+        return events
+
+    def flush(self):
+        """Finish the current utterance, e.g. at the end of speech or of the audio source"""
+        events = []
+        if self.mode == "wake":
+            self._clear_replay()
+            self._wake_final(self.wake_detector.end_utterance(), events)
+            return events
+        self.wake_detector.end_utterance()
+        self._final(self.recognizer.FinalResult(), events)
+        return events
+
+    def report(self):
+        for mode, audio in self.audio_seconds.items():
+            if audio:
+                log_metric(f"ASR CPU per audio-second ({mode})", self.cpu_seconds[mode] / audio * 1000)
+                log_metric(f"ASR audio in {mode} mode", audio, "s")
+        if self.vad:
+            self.vad.report()
+
+class AudioRingBuffer:
+    """Preallocated byte ring filled by the capture callback and drained by the decoder thread"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity)
+        self.view = memoryview(self.buffer)
+        self.read_pos = 0
+        self.size = 0
+        self.closed = False
+        self.overflows = 0
+        self.underruns = 0
+        self.cond = threading.Condition()
+
+    def write(self, data):
+        data = memoryview(data)[-self.capacity:]
+        n = len(data)
+        with self.cond:
+            free = self.capacity - self.size
+            if n > free:
+                # Reader fell behind: drop the oldest audio rather than block the audio callback.
+                self.overflows += 1
+                self.read_pos = (self.read_pos + n - free) % self.capacity
+                self.size -= n - free
+            write_pos = (self.read_pos + self.size) % self.capacity
+            first = min(n, self.capacity - write_pos)
+            self.view[write_pos:write_pos + first] = data[:first]
+            if n > first:
+                self.view[:n - first] = data[first:]
+            self.size += n
+            self.cond.notify()
+
+    def read(self, n, timeout=None):
+        """Return n bytes (fewer only at end of stream), None on timeout, or b"" once closed and drained"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.size >= n or self.closed, timeout):
+                self.underruns += 1
+                return None
+            n = min(n, self.size)
+            if not n:
+                return b""
+            first = min(n, self.capacity - self.read_pos)
+            out = bytes(self.view[self.read_pos:self.read_pos + first])
+            if n > first:
+                out += bytes(self.view[:n - first])
+            self.read_pos = (self.read_pos + n) % self.capacity
+            self.size -= n
+            return out
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+class AudioSource:
+    """Base for anything that fills a ring buffer with 16-bit mono PCM"""
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=AUDIO_FRAME_MS):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * 2
+        self.ring = AudioRingBuffer(sample_rate * 2 * AUDIO_RING_SECONDS)
+        self.device_overflows = 0
+        self.flush_on_idle = False  # end the open utterance when no audio arrives for a while
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self.ring.close()
+
+    def read_frame(self, timeout=1.0):
+        return self.ring.read(self.frame_bytes, timeout)
+
+    def report(self):
+        log_metric("Audio ring overflows", self.ring.overflows, "")
+        log_metric("Audio ring underruns", self.ring.underruns, "")
+        log_metric("Audio device overflows", self.device_overflows, "")
+
+class MicrophoneSource(AudioSource):
+    """PyAudio callback-mode capture"""
+    def _callback(self, in_data, frame_count, time_info, status):
+        if status & self.pyaudio.paInputOverflow:
+            self.device_overflows += 1
+        self.ring.write(in_data)
+        return (None, self.pyaudio.paContinue)
+
+    def start(self):
+        import pyaudio
+        self.pyaudio = pyaudio
+        self.audio = pyaudio.PyAudio()
+
+        for i in range(self.audio.get_device_count()):
+            dev_info = self.audio.get_device_info_by_index(i)
+            if dev_info['maxInputChannels'] > 0:
+                print(f"Microphone: {dev_info['name']}")
+
+        self.stream = self.audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.frame_bytes // 2,
+            stream_callback=self._callback
+        )
+        self.stream.start_stream()
+
+    def stop(self):
+        super().stop()
+        try:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.audio.terminate()
+        except Exception:
+            pass
+
+class FileAudioSource(AudioSource):
+    """Feeds a 16-bit mono WAV file in place of the microphone"""
+    def __init__(self, path, frame_ms=AUDIO_FRAME_MS, realtime=True):
+        import wave
+        self.wav = wave.open(path, "rb")
+        if self.wav.getnchannels() != 1 or self.wav.getsampwidth() != 2:
+            raise ValueError("Expected 16-bit mono WAV")
+        super().__init__(self.wav.getframerate(), frame_ms)
+        self.realtime = realtime
+
+    def _pump(self):
+        frames = self.frame_bytes // 2
+        started = time.monotonic()
+        fed = 0
+        while not self.ring.closed:
+            data = self.wav.readframes(frames)
+            if not data:
+                break
+            if self.realtime:
+                time.sleep(max(0.0, started + fed / self.sample_rate - time.monotonic()))
+            else:
+                with self.ring.cond:
+                    self.ring.cond.wait_for(lambda: self.ring.capacity - self.ring.size >= len(data) or self.ring.closed)
+            self.ring.write(data)
+            fed += len(data) // 2
+        self.ring.close()
+
+    def start(self):
+        Thread(target=self._pump, daemon=True).start()
+
+class SocketAudioSource(AudioSource):
+    """PCM pushed by headless daemon clients; a fast sender blocks instead of overwriting audio"""
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=AUDIO_FRAME_MS):
+        super().__init__(sample_rate, frame_ms)
+        self.flush_on_idle = True
+
+    def push(self, data):
+        for offset in range(0, len(data), self.ring.capacity // 2):
+            chunk = data[offset:offset + self.ring.capacity // 2]
+            with self.ring.cond:
+                self.ring.cond.wait_for(lambda: self.ring.capacity - self.ring.size >= len(chunk) or self.ring.closed)
+            self.ring.write(chunk)
 
 class ListenerThread(QtCore.QThread):
-    wake = QtCore.pyqtSignal()
-    text = QtCore.pyqtSignal(str)
+    wake = QtCore.pyqtSignal(str)
+    wake_command = QtCore.pyqtSignal(str, str)
+    text = QtCore.pyqtSignal(str, str)
+
+    def __init__(self, source=None):
+        super().__init__()
+        self.source = source
+        self.pipeline = None
+        self.low_cost = False
+
+    def set_low_cost(self, enabled):
+        """Run only the wake grammar while the app is asleep or waiting for the wake word"""
+        self.low_cost = enabled
+        if self.pipeline:
+            self.pipeline.set_low_cost(enabled)
+
+    def stop(self):
+        """End the audio source; run() flushes the open utterance and returns"""
+        if self.source:
+            self.source.stop()
 
     def run(self):
         try:
-            self.audio = pyaudio.PyAudio()
-
-            for i in range(self.audio.get_device_count()):
-                dev_info = self.audio.get_device_info_by_index(i)
-                if dev_info['maxInputChannels'] > 0:
-                    print(f"Microphone: {dev_info['name']}")
+            model = wait_for_model()
+            if model is None:
+                return
 
-            self.stream = self.audio.open(
-                format=pyaudio.paInt16,
-                channels=1,
-                rate=16000,
-                input=True,
-                frames_per_buffer=4096
-            )
-            self.stream.start_stream()
+            with startup_profile.stage("audio capture"):
+                source = self.source or MicrophoneSource()
+                self.source = source
+                source.start()
 
-            recognizer = vosk.KaldiRecognizer(model, 16000)
+            pipeline = VoicePipeline(model, source.sample_rate, low_cost=self.low_cost)
+            self.pipeline = pipeline
+            startup_profile.record("listener ready", _PROCESS_STARTED, time.perf_counter())
+            startup_profile.report()
+            last_report = time.monotonic()
 
             print("[SYSTEM] Voice listener started...")
             print(f"[SYSTEM] Say '{WAKE_WORD}' to activate")
 
             while True:
-                data = self.stream.read(4096, exception_on_overflow=False)
-                if recognizer.AcceptWaveform(data):
-                    result = json.loads(recognizer.Result())
-                    text_data = result.get("text", "").lower().strip()
-
-                    if text_data:
-                        print(f"[USER]: {text_data}")
-                        if WAKE_WORD in text_data:
-                            self.wake.emit()
-                        else:
-                            self.text.emit(text_data)
+                data = source.read_frame()
+                if data is None:
+                    if source.flush_on_idle and pipeline.trace_id is not None:
+                        self.emit_events(pipeline.flush())
+                    continue
+                if not data:
+                    self.emit_events(pipeline.flush())
+                    pipeline.report()
+                    break
+                self.emit_events(pipeline.feed(data))
+                if time.monotonic() - last_report >= STATS_REPORT_SECONDS:
+                    source.report()
+                    pipeline.report()
+                    last_report = time.monotonic()
+        except Exception as e:
+            print(f"[LISTENER ERROR]: {e}")
+
+    def emit_events(self, events):
+        for event in events:
+            if event[0] == "wake":
+                self.wake.emit(event[1] or "")
+            elif event[0] == "wake_command":
+                self.wake_command.emit(event[1], event[2] or "")
+            else:
+                self.text.emit(event[1], event[2] or "")
+
+class SharedAudioRing:
+    """Single-producer, single-consumer byte ring in shared memory, so PCM reaches the ASR
+    process without pickling. The header holds ever-increasing write and read offsets and a
+    closed flag; each field has a single writer, so no cross-process lock is needed. The
+    producer never overwrites unread audio: a full ring rejects the write and counts it."""
+    HEADER = struct.Struct("<QQQ")
+
+    def __init__(self, capacity, name=None):
+        from multiprocessing import shared_memory
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=self.HEADER.size + capacity)
+        self.name = self.shm.name
+        self.capacity = capacity
+        self.data = self.shm.buf[self.HEADER.size:self.HEADER.size + capacity]
+        self.overflows = 0
+        if self.owner:
+            self.HEADER.pack_into(self.shm.buf, 0, 0, 0, 0)
+
+    def positions(self):
+        return self.HEADER.unpack_from(self.shm.buf, 0)
+
+    def write(self, data):
+        written, read, closed = self.positions()
+        n = len(data)
+        if n > self.capacity - (written - read):
+            self.overflows += 1
+            return False
+        start = written % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[start:start + first] = data[:first]
+        if n > first:
+            self.data[:n - first] = data[first:]
+        struct.pack_into("<Q", self.shm.buf, 0, written + n)
+        return True
+
+    def read(self, n, timeout=None):
+        """Same contract as AudioRingBuffer.read; waits by polling, as there is no shared condition"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            written, read, closed = self.positions()
+            available = written - read
+            if available >= n or closed:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(0.005)
+        n = min(n, available)
+        if not n:
+            return b""
+        start = read % self.capacity
+        first = min(n, self.capacity - start)
+        out = bytes(self.data[start:start + first])
+        if n > first:
+            out += bytes(self.data[:n - first])
+        struct.pack_into("<Q", self.shm.buf, 8, read + n)
+        return out
+
+    def backlog(self):
+        written, read, _ = self.positions()
+        return written - read
+
+    def close(self):
+        struct.pack_into("<Q", self.shm.buf, 16, 1)
+
+    def release(self):
+        self.data.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def asr_process_main(results, control, ring_name, ring_capacity, sample_rate, low_cost):
+    """Entry point of the ASR child process. Decodes audio from the shared ring, or from its own
+    microphone when ring_name is None, and sends pipeline events back on results"""
+    tracer.jsonl_path = None
+    model = load_model()
+    if model is None:
+        results.put(("error", "Vosk model failed to load"))
+        return
+    if ring_name:
+        ring = SharedAudioRing(ring_capacity, ring_name)
+        source = None  # the parent owns the source and reports its stats
+        frame_bytes = int(sample_rate * AUDIO_FRAME_MS / 1000) * 2
+        read_frame = lambda: ring.read(frame_bytes, timeout=1.0)
+    else:
+        ring = None
+        source = MicrophoneSource(sample_rate)
+        source.start()
+        read_frame = source.read_frame
+    pipeline = VoicePipeline(model, sample_rate, low_cost=low_cost)
+    results.put(("ready",))
+    last_report = time.monotonic()
+
+    def send(events):
+        for event in events:
+            trace_id = event[-1]
+            results.put(("event", event, tracer.age(trace_id), tracer.age(trace_id, "speech_end"),
+                         time.monotonic()))
+
+    while True:
+        try:
+            command = control.get_nowait()
+        except Empty:
+            pass
+        else:
+            if command is None:
+                break
+            pipeline.set_low_cost(command)
+        data = read_frame()
+        if data is None:
+            continue
+        if not data:
+            send(pipeline.flush())
+            break
+        send(pipeline.feed(data))
+        if time.monotonic() - last_report >= STATS_REPORT_SECONDS:
+            if source:
+                source.report()
+            pipeline.report()
+            last_report = time.monotonic()
+    if source:
+        source.report()
+        source.stop()
+    pipeline.report()
+    if ring:
+        ring.data.release()
+        ring.shm.close()
+    results.put(("eof",))
+
+class ProcessListener(ListenerThread):
+    """ListenerThread with capture and decoding moved to a child process. This thread only
+    relays results, so decoding can't hold the GIL against the UI or the audio callback.
+    With a source, this process pumps its audio into a SharedAudioRing that outlives the
+    child; a crashed decoder is restarted and picks up where the ring left off."""
+    def __init__(self, source=None):
+        super().__init__(source)
+        import multiprocessing
+        self.mp = multiprocessing.get_context("spawn")
+        self.results = None
+        self.control = None
+        self.process = None
+        self.ring = None
+        self.pump_thread = None
+        self.running = True
+        self.restarts = 0
+        self.queue_latencies = deque(maxlen=500)
+
+    def set_low_cost(self, enabled):
+        self.low_cost = enabled
+        if self.control is not None:
+            self.control.put(enabled)
+
+    def stop(self):
+        self.running = False
+        if self.control is not None:
+            self.control.put(None)
+        super().stop()
+        if self.ring:
+            self.ring.close()
+
+    def _spawn(self):
+        # Fresh queues for every child: one killed mid-put can leave a queue corrupt or its write
+        # lock held, and the next child would then block forever on put() while looking alive.
+        self._retire_queues()
+        self.results = self.mp.Queue()
+        self.control = self.mp.Queue()
+        sample_rate = self.source.sample_rate if self.source else SAMPLE_RATE
+        self.process = self.mp.Process(
+            target=asr_process_main,
+            args=(self.results, self.control, self.ring.name if self.ring else None,
+                  self.ring.capacity if self.ring else 0, sample_rate, self.low_cost),
+            daemon=True,
+        )
+        self.process.start()
+
+    def _retire_queues(self):
+        """Relay what the previous child managed to send, then close its queues"""
+        if self.results is not None:
+            while True:
+                try:
+                    message = self.results.get_nowait()
+                except Empty:
+                    break
+                except Exception:
+                    break  # half-written by a dying child
+                if message[0] == "event":
+                    self._relay(message)
+            self.results.close()
+        if self.control is not None:
+            self.control.close()
+            self.control.cancel_join_thread()
+
+    def _pump(self):
+        while self.running:
+            data = self.source.read_frame()
+            if data is None:
+                continue
+            if not data:
+                break
+            self.ring.write(data)
+        self.ring.close()
+
+    def _relay(self, message):
+        _, event, age, speech_age, sent = message
+        latency = time.monotonic() - sent
+        self.queue_latencies.append(latency * 1000)
+        trace_id = event[-1]
+        tracer.adopt(trace_id, (age or 0.0) + latency, None if speech_age is None else speech_age + latency)
+        if event[0] != "wake":
+            tracer.mark(trace_id, "asr_final")
+        self.emit_events([event])
+
+    def report(self):
+        log_metric("ASR queue latency p50", percentile(self.queue_latencies, 50))
+        log_metric("ASR queue latency p95", percentile(self.queue_latencies, 95))
+        log_metric("ASR process restarts", self.restarts, "")
+        if self.source:
+            self.source.report()
+        if self.ring:
+            log_metric("ASR shared ring backlog", self.ring.backlog() / 2 / self.source.sample_rate * 1000)
+            log_metric("ASR shared ring overflows", self.ring.overflows, "")
+
+    def run(self):
+        try:
+            if self.source:
+                self.source.start()
+                self.ring = SharedAudioRing(self.source.sample_rate * 2 * ASR_PROCESS_RING_SECONDS)
+                self.pump_thread = Thread(target=self._pump, daemon=True)
+                self.pump_thread.start()
+            self._spawn()
+            print("[SYSTEM] Voice listener started in a separate process...")
+            last_report = time.monotonic()
+            backoff = 1.0
+            while True:
+                try:
+                    message = self.results.get(timeout=0.5)
+                except Empty:
+                    if self.process.is_alive():
+                        continue
+                    if not self.running:
+                        break
+                    self.restarts += 1
+                    print(f"[ASR] Decoder process exited with code {self.process.exitcode}, restarting")
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 30.0)
+                    self._spawn()
+                    continue
+                if message[0] == "event":
+                    self._relay(message)
+                elif message[0] == "ready":
+                    backoff = 1.0
+                    startup_profile.record("listener ready", _PROCESS_STARTED, time.perf_counter())
+                    startup_profile.report()
+                elif message[0] == "error":
+                    print(f"[LISTENER ERROR]: {message[1]}")
+                    break
+                elif message[0] == "eof":
+                    break
+                if time.monotonic() - last_report >= STATS_REPORT_SECONDS:
+                    self.report()
+                    last_report = time.monotonic()
+            self.report()
         except Exception as e:
             print(f"[LISTENER ERROR]: {e}")
+        finally:
+            if self.process and self.process.is_alive():
+                self.process.join(2)
+                if self.process.is_alive():
+                    self.process.kill()
+            if self.pump_thread:
+                self.pump_thread.join(2)
+            if self.ring:
+                self.ring.release()
+
+class OllamaError(Exception):
+    pass
+
+class OllamaCancelled(OllamaError):
+    pass
+
+class CancelToken:
+    """Lets another thread abort a streaming request by shutting down its socket"""
+    def __init__(self):
+        self.cancelled = False
+        self.sock = None
+        self.lock = threading.Lock()
+
+    def attach(self, sock):
+        with self.lock:
+            self.sock = sock
+            if self.cancelled:
+                self._shutdown()
+
+    def detach(self):
+        with self.lock:
+            self.sock = None
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            self._shutdown()
+
+    def _shutdown(self):
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+class OllamaClient:
+    """Streaming client for the local Ollama HTTP API with pooled keep-alive connections"""
+    def __init__(self, host=OLLAMA_HOST, pool_size=2, connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+                 first_token_timeout=OLLAMA_FIRST_TOKEN_TIMEOUT, token_timeout=OLLAMA_TOKEN_TIMEOUT):
+        host = host.split("://")[-1].rstrip("/")
+        self.host, _, port = host.partition(":")
+        self.port = int(port or 11434)
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.first_token_timeout = first_token_timeout
+        self.token_timeout = token_timeout
+        self._pool = Queue()
+        self._server_started = False
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait(), True
+        except Exception:
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.connect_timeout), False
+
+    def _release(self, conn):
+        if self._pool.qsize() < self.pool_size:
+            self._pool.put(conn)
+        else:
+            conn.close()
+
+    def _start_server(self):
+        """Launch `ollama serve` once if nothing is listening on the API port"""
+        if self._server_started:
+            return False
+        self._server_started = True
+        try:
+            subprocess.Popen(
+                [get_ollama_path(), "serve"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            )
+        except FileNotFoundError:
+            return False
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection((self.host, self.port), timeout=self.connect_timeout).close()
+                return True
+            except OSError:
+                time.sleep(0.2)
+        return False
+
+    def _open(self, method, path, body=None, cancel=None):
+        """Send the request, retrying once on a stale pooled connection or a stopped server"""
+        for attempt in range(3):
+            conn, reused = self._acquire()
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                conn.sock.settimeout(self.first_token_timeout)
+                if cancel:
+                    cancel.attach(conn.sock)
+                conn.request(method, path, body, {"Content-Type": "application/json"})
+                return conn, conn.getresponse()
+            except ConnectionRefusedError:
+                conn.close()
+                if attempt or not self._start_server():
+                    raise
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if not reused:
+                    raise
+        raise OllamaError("Could not reach Ollama")
+
+    def _finish(self, conn, resp):
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+    def _call(self, method, path, payload=None):
+        """Non-streaming request, returns the decoded JSON body"""
+        conn, resp = self._open(method, path, json.dumps(payload) if payload is not None else None)
+        try:
+            data = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+        self._finish(conn, resp)
+        if resp.status != 200:
+            raise OllamaError(f"HTTP {resp.status}: {data.decode('utf-8', 'ignore').strip()}")
+        return json.loads(data or b"{}")
+
+    def is_loaded(self, model=MODEL_NAME):
+        models = self._call("GET", "/api/ps").get("models") or []
+        return any(model in (m.get("name"), m.get("model")) for m in models)
+
+    def warm(self, model=MODEL_NAME, keep_alive=OLLAMA_KEEP_ALIVE):
+        """Load the model if needed and pin it for keep_alive; returns (was_resident, elapsed_ms)"""
+        resident = self.is_loaded(model)
+        started = time.perf_counter()
+        self._call("POST", "/api/generate", {"model": model, "keep_alive": keep_alive, "stream": False})
+        return resident, (time.perf_counter() - started) * 1000
+
+    def release(self, model=MODEL_NAME, keep_alive=OLLAMA_SLEEP_KEEP_ALIVE):
+        """Hand the model back to Ollama's normal unload timer, without loading it if it is gone"""
+        if self.is_loaded(model):
+            self._call("POST", "/api/generate", {"model": model, "keep_alive": keep_alive, "stream": False})
+
+    def generate(self, prompt, model=MODEL_NAME, on_token=None, cancel=None, **options):
+        """Stream a completion, calling on_token for each piece, and return Ollama's final chunk
+        with the full text in "response". Raises socket.timeout when the connect or
+        first-token deadline passes, and OllamaCancelled once cancel (a CancelToken) fires;
+        dropping the connection is what makes Ollama stop generating."""
+        body = json.dumps(dict(options, model=model, prompt=prompt, stream=True))
+        try:
+            conn, resp = self._open("POST", "/api/generate", body, cancel)
+        except OSError:
+            if cancel and cancel.cancelled:
+                raise OllamaCancelled()
+            raise
+        try:
+            if resp.status != 200:
+                raise OllamaError(f"HTTP {resp.status}: {resp.read().decode('utf-8', 'ignore').strip()}")
+
+            parts = []
+            final = {}
+            first = True
+            while True:
+                line = resp.readline()
+                if cancel and cancel.cancelled:
+                    raise OllamaCancelled()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise OllamaError(chunk["error"])
+                if first:
+                    conn.sock.settimeout(self.token_timeout)
+                    first = False
+                token = chunk.get("response", "")
+                if token:
+                    parts.append(token)
+                    if on_token:
+                        on_token(token)
+                if chunk.get("done"):
+                    final = chunk
+                    break
+            resp.read()
+        except BaseException as e:
+            conn.close()
+            if cancel and cancel.cancelled and not isinstance(e, OllamaCancelled):
+                raise OllamaCancelled() from e
+            raise
+        finally:
+            if cancel:
+                cancel.detach()
+
+        self._finish(conn, resp)
+        final["response"] = "".join(parts)
+        return final
+
+ollama_client = OllamaClient()
+
+def warm_model_async():
+    """Preload MODEL_NAME in the background and report whether it was already resident"""
+    def _warm():
+        try:
+            resident, elapsed = ollama_client.warm()
+            log_metric("LLM warm-up (model resident)" if resident else "LLM warm-up (cold load)", elapsed)
+        except Exception as e:
+            print(f"[AI] Model warm-up failed: {e}")
+    Thread(target=_warm, daemon=True).start()
+
+def release_model_async():
+    def _release():
+        try:
+            ollama_client.release()
+        except Exception as e:
+            print(f"[AI] Model release failed: {e}")
+    Thread(target=_release, daemon=True).start()
+
+class ResponseCache:
+    """LRU + TTL cache of LLM answers keyed on the normalized prompt and model name"""
+    def __init__(self, max_entries=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL, path=LLM_CACHE_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    @staticmethod
+    def key(prompt, model):
+        normalized = " ".join(re.sub(r"[^\w\s']", " ", prompt.lower()).split())
+        return f"{model}|{normalized}"
+
+    def get(self, prompt, model=MODEL_NAME):
+        key = self.key(prompt, model)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.time():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, prompt, response, model=MODEL_NAME):
+        with self.lock:
+            key = self.key(prompt, model)
+            self.entries[key] = (time.time() + self.ttl, response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        self.save()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                rows = json.load(f)
+            now = time.time()
+            for key, expires, response in rows[-self.max_entries:]:
+                if expires > now:
+                    self.entries[key] = (expires, response)
+        except Exception as e:
+            print(f"[CACHE] Could not load {self.path}: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            rows = [[key, expires, response] for key, (expires, response) in self.entries.items()]
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(rows, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[CACHE] Could not save {self.path}: {e}")
+
+    def report(self):
+        total = self.hits + self.misses
+        log_metric("LLM cache hits", self.hits, "")
+        log_metric("LLM cache misses", self.misses, "")
+        if total:
+            log_metric("LLM cache hit rate", 100.0 * self.hits / total, "%")
+
+response_cache = ResponseCache()
+
+class ConversationSession:
+    """Bounded multi-turn memory. Follow-ups reuse the context Ollama returned for the previous
+    turn, so only the new tokens are evaluated. When that context outgrows the token budget it
+    is dropped, and the next turn restarts from a short transcript of the most recent turns.
+    A question that is not a follow-up starts a new conversation."""
+    FOLLOW_UP = re.compile(
+        r"^(and|but|so|also|then|why|how come|what about|how about|what else|tell me more|more)\b"
+        r"|\b(it|its|that|this|these|those|they|them|their|he|him|his|she|her|there|"
+        r"the same|again|earlier|previous|last one|you said|you just)\b")
+
+    def __init__(self, token_budget=CONVERSATION_TOKEN_BUDGET, max_turns=CONVERSATION_MAX_TURNS,
+                 follow_up_seconds=CONVERSATION_FOLLOW_UP_SECONDS):
+        self.token_budget = token_budget
+        self.follow_up_seconds = follow_up_seconds
+        self.turns = deque(maxlen=max_turns)
+        self.context = None
+        self.turn_count = 0
+        self.last_turn_at = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def estimate_tokens(text):
+        return int(len(text.split()) * 1.3) + 1
+
+    def is_follow_up(self, prompt):
+        """True when prompt comes soon after the last answer and refers back to it
+        ("why", "what about ...", "is it ..."). Anything else is answered on its own and
+        can be served from the response cache."""
+        with self.lock:
+            if not self.turns or self.last_turn_at is None:
+                return False
+            if time.monotonic() - self.last_turn_at > self.follow_up_seconds:
+                return False
+        return bool(self.FOLLOW_UP.search(prompt.lower()))
+
+    def request(self, prompt, follow_up=True):
+        """Return (prompt, generate options) for the next turn"""
+        with self.lock:
+            if not follow_up:
+                return prompt, {}
+            if self.context:
+                return prompt, {"context": self.context}
+            if not self.turns:
+                return prompt, {}
+
+            lines = []
+            budget = self.token_budget // 2 - self.estimate_tokens(prompt)
+            for user, assistant in reversed(self.turns):
+                turn = f"User: {user}\nAssistant: {assistant}"
+                budget -= self.estimate_tokens(turn)
+                if budget < 0:
+                    break
+                lines.insert(0, turn)
+            lines.append(f"User: {prompt}\nAssistant:")
+            return "\n".join(lines), {}
+
+    def record(self, prompt, response, result, follow_up=True):
+        """Remember a turn; result is Ollama's final response, or {} for a cached answer"""
+        with self.lock:
+            if not follow_up:
+                self.turns.clear()
+            self.turns.append((prompt, response))
+            self.turn_count += 1
+            self.last_turn_at = time.monotonic()
+            context = result.get("context")
+            self.context = context if context and len(context) <= self.token_budget else None
+            turn = self.turn_count
+
+        if not result:
+            return
+        log_metric(f"LLM prompt eval turn {turn}", result.get("prompt_eval_duration", 0) / 1e6)
+        log_metric(f"LLM prompt tokens turn {turn}", result.get("prompt_eval_count", 0), "tokens")
+
+    def reset(self):
+        with self.lock:
+            self.turns.clear()
+            self.context = None
+            self.turn_count = 0
+            self.last_turn_at = None
 
 class GemmaSignal(QtCore.QObject):
     finished = QtCore.pyqtSignal(str)
+    token = QtCore.pyqtSignal(str)
+    first_token = QtCore.pyqtSignal(float)
 
 class GemmaWorker(QtCore.QRunnable):
-    def __init__(self, prompt, signal_obj):
+    def __init__(self, prompt, signal_obj, trace_id=None, session=None, follow_up=False):
         super().__init__()
         self.prompt = prompt
         self.signal_obj = signal_obj
+        self.trace_id = trace_id
+        self.session = session
+        self.follow_up = follow_up
+        self.cancel_token = CancelToken()
+        self.scheduler = None
+        self.queued_at = time.perf_counter()
+
+    def cancel(self):
+        """Abort the request; a cancelled worker never emits its signals"""
+        self.cancel_token.cancel()
 
     def run(self):
+        if self.scheduler:
+            self.scheduler.started(self)
         try:
-            print(f"[AI] Processing: {self.prompt}")
+            if not self.cancel_token.cancelled:
+                self.generate()
+        finally:
+            if self.scheduler:
+                self.scheduler.finished(self)
+
+    def generate(self):
+        started = time.perf_counter()
+        first_token_at = []
+
+        def on_token(token):
+            if self.cancel_token.cancelled:
+                return
+            if not first_token_at:
+                first_token_at.append(time.perf_counter())
+                tracer.mark(self.trace_id, "llm_first_token")
+                self.signal_obj.first_token.emit((first_token_at[0] - started) * 1000)
+            self.signal_obj.token.emit(token)
 
-            result = subprocess.run(
-                [OLLAMA_PATH, "run", MODEL_NAME, self.prompt],
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                errors="ignore",
-                timeout=30,
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-            )
+        try:
+            print(f"[AI] Processing: {self.prompt}")
 
-            response = result.stdout.strip()
-            if not response:
+            prompt, options = (self.session.request(self.prompt, self.follow_up) if self.session
+                               else (self.prompt, {}))
+            result = ollama_client.generate(prompt, on_token=on_token, cancel=self.cancel_token,
+                                            keep_alive=OLLAMA_KEEP_ALIVE, **options)
+            log_metric("LLM model load", result.get("load_duration", 0) / 1e6)
+
+            response = result["response"].strip()
+            if response:
+                if self.session:
+                    self.session.record(self.prompt, response, result, self.follow_up)
+                # Follow-up answers depend on the conversation, so they are not reusable.
+                if not self.follow_up:
+                    response_cache.put(self.prompt, response)
+            else:
                 response = "I heard you, but didn't get a response. Please try again."
 
             print(f"[AI RESPONSE]: {response}")
+            log_metric("LLM total time", (time.perf_counter() - started) * 1000)
 
-        except subprocess.TimeoutExpired:
+        except OllamaCancelled:
+            print(f"[AI] Cancelled: {self.prompt}")
+            return
+        except socket.timeout:
             response = "The request took too long to process. Please try again."
-        except FileNotFoundError:
+        except (ConnectionRefusedError, FileNotFoundError):
             response = "Error: Ollama not found. Please make sure Ollama is installed and running."
         except Exception as e:
             response = f"Error processing request: {str(e)}"
 
+        if self.cancel_token.cancelled:
+            return
+        tracer.mark(self.trace_id, "llm_done")
         self.signal_obj.finished.emit(response)
 
+class LLMScheduler:
+    """Runs GemmaWorkers on a private pool capped at max_concurrency. An identical prompt that is
+    already in flight is not asked twice, and a newer question cancels the older ones."""
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY):
+        self.pool = QtCore.QThreadPool()
+        self.pool.setMaxThreadCount(max_concurrency)
+        self.workers = []
+        self.running = 0
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.deduplicated = 0
+        self.superseded = 0
+        self.wait_times = deque(maxlen=200)
+
+    def _in_flight(self, key):
+        return any(w.key == key for w in self.workers if not w.cancel_token.cancelled)
+
+    def already_answering(self, prompt):
+        """True (and counted as deduplicated) when the same prompt is in flight. Check this
+        before interrupting speech, or the original answer loses its queued sentences."""
+        key = ResponseCache.key(prompt, MODEL_NAME)
+        with self.lock:
+            if not self._in_flight(key):
+                return False
+            self.deduplicated += 1
+        print(f"[AI] Already answering: {prompt}")
+        return True
+
+    def submit(self, worker):
+        """Queue a worker; returns False when the same prompt is already in flight"""
+        key = ResponseCache.key(worker.prompt, MODEL_NAME)
+        with self.lock:
+            if self._in_flight(key):
+                self.deduplicated += 1
+                print(f"[AI] Already answering: {worker.prompt}")
+                return False
+            live = [w for w in self.workers if not w.cancel_token.cancelled]
+            for old in live:
+                old.cancel()
+                self.superseded += 1
+            worker.key = key
+            worker.scheduler = self
+            worker.queued_at = time.perf_counter()
+            self.workers.append(worker)
+            self.submitted += 1
+        self.pool.start(worker)
+        return True
+
+    def cancel_all(self):
+        with self.lock:
+            for worker in self.workers:
+                if not worker.cancel_token.cancelled:
+                    worker.cancel()
+                    self.superseded += 1
+
+    def started(self, worker):
+        with self.lock:
+            self.running += 1
+            self.wait_times.append((time.perf_counter() - worker.queued_at) * 1000)
+
+    def finished(self, worker):
+        with self.lock:
+            self.running -= 1
+            if worker in self.workers:
+                self.workers.remove(worker)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "queue_depth": len(self.workers) - self.running,
+                "running": self.running,
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "superseded": self.superseded,
+                "wait_p50_ms": round(percentile(self.wait_times, 50), 1),
+                "wait_p95_ms": round(percentile(self.wait_times, 95), 1),
+            }
+
+llm_scheduler = LLMScheduler()
+
+class ScreenshotSignal(QtCore.QObject):
+    captured = QtCore.pyqtSignal()
+    finished = QtCore.pyqtSignal(str, str)
+
+class ScreenshotWorker(QtCore.QRunnable):
+    """Captures and encodes a screenshot off the GUI thread"""
+    def __init__(self, signal_obj, monitor=SCREENSHOT_MONITOR, region=SCREENSHOT_REGION,
+                 fmt=SCREENSHOT_FORMAT, cursor=None):
+        super().__init__()
+        self.signal_obj = signal_obj
+        self.monitor = monitor
+        self.region = region
+        self.fmt = fmt
+        self.cursor = cursor
+
+    def target(self, sct):
+        if self.region:
+            left, top, width, height = self.region
+            return {"left": left, "top": top, "width": width, "height": height}
+        if self.monitor == "all":
+            return sct.monitors[0]
+        if self.monitor == "active":
+            if self.cursor:
+                x, y = self.cursor
+                for mon in sct.monitors[1:]:
+                    if mon["left"] <= x < mon["left"] + mon["width"] and mon["top"] <= y < mon["top"] + mon["height"]:
+                        return mon
+            return sct.monitors[1]
+        return sct.monitors[int(self.monitor)]
+
+    @staticmethod
+    def write_bmp(shot, path):
+        width, height = shot.size
+        header = b"BM" + (54 + len(shot.bgra)).to_bytes(4, "little") + b"\0\0\0\0" + (54).to_bytes(4, "little")
+        # Negative height: rows are stored top-down, exactly as mss returns them.
+        info = (40).to_bytes(4, "little") + width.to_bytes(4, "little") + (-height).to_bytes(4, "little", signed=True)
+        info += (1).to_bytes(2, "little") + (32).to_bytes(2, "little") + bytes(24)
+        with open(path, 'wb') as f:
+            f.write(header + info)
+            f.write(shot.bgra)
+
+    def run(self):
+        try:
+            import mss
+            import mss.tools
+        except ImportError:
+            self.signal_obj.captured.emit()
+            self.signal_obj.finished.emit("", "Screenshot feature requires the mss package")
+            return
+
+        try:
+            path = os.path.join(BASE_PATH, f"screenshot_{int(time.time())}.{self.fmt}")
+            with mss.mss() as sct:
+                started = time.perf_counter()
+                shot = sct.grab(self.target(sct))
+            captured = time.perf_counter()
+            self.signal_obj.captured.emit()
+
+            if self.fmt == "bmp":
+                self.write_bmp(shot, path)
+            elif self.fmt == "webp":
+                from PIL import Image
+                Image.frombytes("RGB", shot.size, shot.rgb).save(path, "WEBP", quality=80, method=0)
+            else:
+                mss.tools.to_png(shot.rgb, shot.size, level=SCREENSHOT_PNG_LEVEL, output=path)
+
+            log_metric("Screenshot capture", (captured - started) * 1000)
+            log_metric("Screenshot encode", (time.perf_counter() - captured) * 1000)
+            self.signal_obj.finished.emit(path, "")
+        except Exception as e:
+            print(f"[SCREENSHOT ERROR]: {e}")
+            self.signal_obj.captured.emit()
+            self.signal_obj.finished.emit("", "Screenshot failed")
+
+class NoteWriter:
+    """Background writer for dictated notes: lines are batched and flushed every
+    flush_interval seconds or on close, and the file is rotated once it passes max_bytes"""
+    def __init__(self, path, flush_interval=NOTES_FLUSH_SECONDS, fsync=NOTES_FSYNC, max_bytes=NOTES_MAX_BYTES):
+        self.path = path
+        self.base_path = path
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.queue = Queue()
+        self.lines_written = 0
+        self.batches = 0
+        self.rotations = 0
+        self.file = open(path, 'a', encoding='utf-8')
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, line):
+        self.queue.put(line)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        closing = False
+        while not closing:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while self.fsync != "always":
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+        self.file.close()
+
+    def _flush(self, batch):
+        try:
+            self.file.write("".join(batch))
+            self.file.flush()
+            if self.fsync != "never":
+                os.fsync(self.file.fileno())
+            self.lines_written += len(batch)
+            self.batches += 1
+            if self.file.tell() >= self.max_bytes:
+                self._rotate()
+        except Exception as e:
+            print(f"[NOTES] Write failed: {e}")
+
+    def _rotate(self):
+        self.file.close()
+        self.rotations += 1
+        root, ext = os.path.splitext(self.base_path)
+        self.path = f"{root}.{self.rotations}{ext}"
+        self.file = open(self.path, 'a', encoding='utf-8')
+        print(f"[NOTES] Continuing in {self.path}")
+
 class GlowUI(QtWidgets.QWidget):
+    RADIUS = 300
+
     def __init__(self):
         super().__init__()
         self.setAttribute(QtCore.Qt.WidgetAttribute.WA_TranslucentBackground)
@@ -266,14 +2594,61 @@ class GlowUI(QtWidgets.QWidget):
         self.glow = 0
         self.increasing = True
         self.active_mode = False
+        # One full-strength frame per mode; each tick only changes its opacity.
+        self.frames = {}
+        self.frame_count = 0
+        self.frame_time_total = 0.0
+        self.frame_time_max = 0.0
 
-        timer = QtCore.QTimer(self)
-        timer.timeout.connect(self.updateGlow)
-        timer.start(20)
+        # Only runs while visible, see showEvent/hideEvent.
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(20)
+        self.timer.timeout.connect(self.updateGlow)
 
     def set_active(self, active):
         self.active_mode = active
 
+    def showEvent(self, event):
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        self.report_frames()
+        super().hideEvent(event)
+
+    def glow_rect(self):
+        center = self.rect().center()
+        return QtCore.QRect(center.x() - self.RADIUS, center.y() - self.RADIUS, 2 * self.RADIUS, 2 * self.RADIUS)
+
+    def glow_frame(self):
+        ratio = self.devicePixelRatioF()
+        key = (self.active_mode, ratio)
+        pixmap = self.frames.get(key)
+        if pixmap is None:
+            size = int(2 * self.RADIUS * ratio)
+            pixmap = QtGui.QPixmap(size, size)
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(QtCore.Qt.GlobalColor.transparent)
+
+            if self.active_mode:
+                color = QtGui.QColor(100, 255, 200, 255)
+            else:
+                color = QtGui.QColor(100, 200, 255, 255)
+
+            gradient = QtGui.QRadialGradient(self.RADIUS, self.RADIUS, float(self.RADIUS))
+            gradient.setColorAt(0, color)
+            gradient.setColorAt(1, QtGui.QColor(0, 0, 0, 0))
+
+            painter = QtGui.QPainter(pixmap)
+            painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+            painter.setBrush(QtGui.QBrush(gradient))
+            painter.setPen(QtCore.Qt.PenStyle.NoPen)
+            painter.drawEllipse(QtCore.QPointF(self.RADIUS, self.RADIUS), self.RADIUS, self.RADIUS)
+            painter.end()
+            self.frames[key] = pixmap
+        return pixmap
+
     def updateGlow(self):
         step = 2 if self.active_mode else 1
         max_glow = 180 if self.active_mode else 120
@@ -286,81 +2661,106 @@ class GlowUI(QtWidgets.QWidget):
             self.glow -= step
             if self.glow <= 40:
                 self.increasing = True
-        self.update()
+        self.update(self.glow_rect())
 
     def paintEvent(self, event):
+        started = time.perf_counter()
         painter = QtGui.QPainter(self)
-        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
-        rect = self.rect()
-        center = QtCore.QPointF(rect.center().x(), rect.center().y())
-
-        if self.active_mode:
-            color = QtGui.QColor(100, 255, 200, self.glow)
-        else:
-            color = QtGui.QColor(100, 200, 255, self.glow)
-
-        gradient = QtGui.QRadialGradient(center.x(), center.y(), 300.0)
-        gradient.setColorAt(0, color)
-        gradient.setColorAt(1, QtGui.QColor(0, 0, 0, 0))
-
-        painter.setBrush(QtGui.QBrush(gradient))
-        painter.setPen(QtCore.Qt.PenStyle.NoPen)
-        painter.drawEllipse(center, 300, 300)
-
-class JarvisApp(QtWidgets.QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.ui = GlowUI()
-        self.setCentralWidget(self.ui)
-        self.setAttribute(QtCore.Qt.WidgetAttribute.WA_TranslucentBackground)
-        self.setWindowFlags(
-            QtCore.Qt.WindowType.FramelessWindowHint |
-            QtCore.Qt.WindowType.WindowStaysOnTopHint
-        )
-        self.showFullScreen()
-
+        painter.setOpacity(max(0, self.glow) / 255.0)
+        painter.drawPixmap(self.glow_rect().topLeft(), self.glow_frame())
+        painter.end()
+
+        elapsed = (time.perf_counter() - started) * 1000
+        self.frame_count += 1
+        self.frame_time_total += elapsed
+        self.frame_time_max = max(self.frame_time_max, elapsed)
+
+    def report_frames(self):
+        if self.frame_count:
+            log_metric("Glow frames painted", self.frame_count)
+            log_metric("Glow paint time avg", self.frame_time_total / self.frame_count)
+            log_metric("Glow paint time max", self.frame_time_max)
+        self.frame_count = 0
+        self.frame_time_total = 0.0
+        self.frame_time_max = 0.0
+
+class JarvisCore:
+    """Command routing, LLM and speech handling without any widgets. Mixed into the window
+    (JarvisApp) and the headless daemon, which supply the front-end hooks."""
+    def init_core(self, listen=True, source=None):
+        """State, TTS, background loading and the listener shared by every front end"""
+        self.listener = None
         self.is_listening = False
         self.sleep_mode = False
         self.notes_process = None
         self.notes_path = None
+        self.note_writer = None
         self.is_writing_notes = False
-
-        self.setup_tray()
-
-        self.listener = ListenerThread()
+        self.conversation = ConversationSession()
+        self.wake_started_at = None
+        self.woke_from_sleep = False
+        self.awaiting_command_since = None
+        self.wake_to_command = {"one-shot": deque(maxlen=50), "two-step": deque(maxlen=50)}
+
+        with startup_profile.stage("tts thread"):
+            start_tts()
+        Thread(target=self.load_in_background, daemon=True).start()
+
+        self.listener = ProcessListener(source) if ASR_PROCESS else ListenerThread(source)
+        self.update_listener_mode()
         self.listener.wake.connect(self.onWake)
+        self.listener.wake_command.connect(self.onWakeCommand)
         self.listener.text.connect(self.onText)
-        self.listener.start()
-
-        # Startup announcement: run every time the app initializes.
-        def _startup_notify():
-            try:
-                speak("Jarvis is ready, say Jarvis to activate")
-            except Exception as e:
-                print(f"[STARTUP] Notify failed: {e}")
-
-        QtCore.QTimer.singleShot(1500, _startup_notify)
-
-    def test_tts_methods(self):
-        print("\n" + "="*60)
-        print("TESTING TTS METHODS...")
-        print("="*60)
-
-        methods = [
-            ("Windows SAPI", "Testing Windows built-in speech"),
-            ("PowerShell TTS", "Testing PowerShell speech synthesis"),
-            ("Edge TTS", "Testing online speech service")
-        ]
-
-        for i, (method_name, test_text) in enumerate(methods):
-            print(f"\nTesting {method_name}...")
-            QtCore.QTimer.singleShot(i * 3000, lambda m=method_name, t=test_text: self.test_method(m, t))
-
-        QtCore.QTimer.singleShot(len(methods) * 3000 + 2000, self.final_ready)
-
-    def test_method(self, method_name, test_text):
-        print(f"🎧 {method_name}: '{test_text}'")
-        speak(test_text)
+        if listen:
+            self.listener.start()
+
+    # Front-end hooks; the window overrides these, the headless daemon leaves them be.
+    def present(self):
+        """Bring the assistant to the foreground, listening"""
+        pass
+
+    def set_ui_active(self, active):
+        pass
+
+    def dismiss(self):
+        """Get out of the way, e.g. when going to sleep"""
+        pass
+
+    def on_reply(self, response):
+        """A complete answer from the model"""
+        pass
+
+    @property
+    def is_listening(self):
+        return self._is_listening
+
+    @is_listening.setter
+    def is_listening(self, value):
+        self._is_listening = value
+        self.update_listener_mode()
+
+    @property
+    def sleep_mode(self):
+        return self._sleep_mode
+
+    @sleep_mode.setter
+    def sleep_mode(self, value):
+        self._sleep_mode = value
+        self.update_listener_mode()
+
+    def update_listener_mode(self):
+        """Only the wake grammar matters while asleep or before the wake word"""
+        if self.listener:
+            self.listener.set_low_cost(getattr(self, "_sleep_mode", False) or not getattr(self, "_is_listening", False))
+
+    def load_in_background(self):
+        load_model()
+        with startup_profile.stage("ollama path"):
+            get_ollama_path()
+        warm_model_async()
+        if METRICS_PORT:
+            tracer.add_source("llm_scheduler", llm_scheduler.stats)
+            tracer.serve(METRICS_PORT)
 
     def open_chrome_search(self, query=None):
         try:
@@ -407,7 +2807,9 @@ class JarvisApp(QtWidgets.QMainWindow):
         try:
             name = f"notes_{int(time.time())}.txt"
             path = os.path.join(BASE_PATH, name)
-            open(path, 'a', encoding='utf-8').close()
+            if self.note_writer:
+                self.note_writer.close()
+            self.note_writer = NoteWriter(path)
             p = subprocess.Popen(["notepad.exe", path], shell=True)
             self.notes_process = p
             self.notes_path = path
@@ -420,10 +2822,12 @@ class JarvisApp(QtWidgets.QMainWindow):
         try:
             if not self.notes_path:
                 self.open_notes()
+            if not self.note_writer:
+                self.note_writer = NoteWriter(self.notes_path)
             ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            with open(self.notes_path, 'a', encoding='utf-8') as f:
-                f.write(f"[{ts}] {text}\n")
-            speak("Noted")
+            self.note_writer.write(f"[{ts}] {text}\n")
+            if NOTES_SPOKEN_ACK:
+                speak("Noted", priority=PRIORITY_SYSTEM)
         except Exception:
             speak("Failed to write note")
 
@@ -434,127 +2838,125 @@ class JarvisApp(QtWidgets.QMainWindow):
                     self.notes_process.terminate()
                 except Exception:
                     subprocess.run(['taskkill', '/F', '/T', '/PID', str(self.notes_process.pid)], shell=True)
+            if self.note_writer:
+                self.note_writer.close()
+                self.note_writer = None
             self.is_writing_notes = False
             speak("Notes closed")
         except Exception:
             speak("Failed to close notes")
 
-    def tell_time(self):
-        now = datetime.datetime.now()
-        speak(f"The time is {now.strftime('%I:%M %p')}")
-
-    def take_screenshot(self):
-        try:
-            import mss
-
-            try:
-                was_visible = self.isVisible()
-                if was_visible:
-                    self.hide()
-                    QtWidgets.QApplication.processEvents()
-                    time.sleep(0.15)
-            except Exception:
-                pass
+    def open_youtube(self):
+        webbrowser.open("https://www.youtube.com")
+        speak("Opening YouTube")
 
-            out = os.path.join(BASE_PATH, f"screenshot_{int(time.time())}.png")
-            with mss.mss() as sct:
-                sct.shot(output=out)
-
-            try:
-                if was_visible:
-                    self.showFullScreen()
-                    QtWidgets.QApplication.processEvents()
-            except Exception:
-                pass
-
-            speak("Screenshot saved")
-        except Exception:
-            speak("Screenshot feature requires the mss package")
+    def stop_speaking(self):
+        flushed, stopped = speech_queue.interrupt(PRIORITY_SYSTEM)
+        llm_scheduler.cancel_all()
+        print(f"[SYSTEM] Speech stopped ({flushed} pending dropped)")
 
-    def final_ready(self):
-        speak("All systems operational. Jarvis is ready. Say Jarvis to begin.")
-        print("✓ System fully ready - Say 'Jarvis' to activate!")
-
-    def setup_tray(self):
-        icon_path = os.path.join(BASE_PATH, "jarvis.ico")
-        if os.path.exists(icon_path):
-            icon = QtGui.QIcon(icon_path)
-        else:
-            pixmap = QtGui.QPixmap(32, 32)
-            pixmap.fill(QtGui.QColor(100, 200, 255))
-            icon = QtGui.QIcon(pixmap)
-
-        self.tray = QtWidgets.QSystemTrayIcon(icon)
-        self.tray.activated.connect(self.tray_activated)
-
-        menu = QtWidgets.QMenu()
-        show_action = menu.addAction("Show")
-        show_action.triggered.connect(self.show_window)
-        wake_action = menu.addAction("Wake")
-        wake_action.triggered.connect(self.wake_from_tray)
-        test_audio_action = menu.addAction("Test Audio")
-        test_audio_action.triggered.connect(self.test_audio)
-        exit_action = menu.addAction("Exit")
-        exit_action.triggered.connect(self.exit_app)
+    def go_to_sleep(self):
+        speak("Going to sleep mode. Say Jarvis to wake me up.")
+        self.is_listening = False
+        self.dismiss()
+        llm_scheduler.cancel_all()
+        self.conversation.reset()
+        release_model_async()
+
+    def minimize_to_tray(self):
+        speak("Minimizing to system tray")
+        self.dismiss()
+        self.sleep_mode = True
+        self.is_listening = False
+        llm_scheduler.cancel_all()
+        self.conversation.reset()
+        release_model_async()
 
-        self.tray.setContextMenu(menu)
-        self.tray.setVisible(True)
-        self.tray.showMessage("JARVIS", "Assistant is running in system tray", icon, 2000)
+    def tell_time(self):
+        now = datetime.datetime.now()
+        speak(f"The time is {now.strftime('%I:%M %p')}")
 
-    def test_audio(self):
-        speak("This is a manual audio test. Can you hear me clearly?")
+    def take_screenshot(self, monitor=SCREENSHOT_MONITOR):
+        self.start_screenshot(monitor, None, False)
 
-    def tray_activated(self, reason):
-        if reason == QtWidgets.QSystemTrayIcon.ActivationReason.DoubleClick:
-            self.show_window()
+    def take_screenshot_all(self):
+        self.take_screenshot(monitor="all")
 
-    def show_window(self):
-        self.sleep_mode = False
-        self.showFullScreen()
-        self.activateWindow()
-        self.raise_()
+    def start_screenshot(self, monitor, cursor, was_visible):
+        signal_obj = ScreenshotSignal()
+        if was_visible:
+            signal_obj.captured.connect(self.showFullScreen)
+        signal_obj.finished.connect(self.handleScreenshot)
+        worker = ScreenshotWorker(signal_obj, monitor=monitor, cursor=cursor)
+        QtCore.QThreadPool.globalInstance().start(worker)
 
-    def onWake(self):
-        if getattr(self, 'sleep_mode', False):
+    def handleScreenshot(self, path, error):
+        speak(error or "Screenshot saved")
+
+    def onWake(self, trace_id=""):
+        """Wake word spotted mid-utterance: show the UI now and leave the acknowledgement to
+        onWakeCommand, which knows whether a command followed"""
+        tracer.current = trace_id or None
+        tracer.mark(trace_id, "intent")
+        speech_queue.interrupt()
+        llm_scheduler.cancel_all()
+        self.wake_started_at = time.perf_counter()
+        self.woke_from_sleep = getattr(self, 'sleep_mode', False)
+        if self.woke_from_sleep:
             # Wake up when wake word detected even while sleeping
             try:
                 self.sleep_mode = False
-                self.showFullScreen()
-                self.activateWindow()
-                self.ui.set_active(True)
-                self.is_listening = True
-                speak("Waking up. I'm ready.")
+                warm_model_async()
                 print('[SYSTEM] Woken by wake word while sleeping')
             except Exception:
                 pass
-            return
 
-        self.showFullScreen()
-        self.activateWindow()
-        self.ui.set_active(True)
+        self.present()
         self.is_listening = True
-        speak("Yes sir? I'm listening and ready for your commands.")
 
-    def onText(self, text):
+    def onWakeCommand(self, command, trace_id=""):
+        """End of an utterance with the wake word: run what followed it, or acknowledge"""
+        if self.wake_started_at is None:
+            self.onWake(trace_id)
+        woken_at, self.wake_started_at = self.wake_started_at, None
+        if command and not any(command == phrase for phrase in WAKE_PHRASES):
+            self.awaiting_command_since = None
+            self.record_wake_to_command("one-shot", woken_at)
+            self.onText(command, trace_id)
+            return
+        speak("Waking up. I'm ready." if self.woke_from_sleep else "Yes sir?", priority=PRIORITY_SYSTEM)
+        self.awaiting_command_since = woken_at
+
+    def record_wake_to_command(self, kind, woken_at):
+        samples = self.wake_to_command[kind]
+        samples.append((time.perf_counter() - woken_at) * 1000)
+        log_metric(f"Wake to command ({kind})", samples[-1])
+        one_shot, two_step = self.wake_to_command["one-shot"], self.wake_to_command["two-step"]
+        if one_shot and two_step:
+            log_metric("Latency saved per one-shot command", percentile(two_step, 50) - percentile(one_shot, 50))
+
+    def onText(self, text, trace_id=""):
         text = text.lower().strip()
+        tracer.current = trace_id or None
         if getattr(self, 'sleep_mode', False):
             for phrase in WAKE_PHRASES:
                 if phrase in text:
                     try:
                         self.sleep_mode = False
-                        self.showFullScreen()
-                        self.activateWindow()
-                        self.ui.set_active(True)
+                        self.present()
                         self.is_listening = True
-                        speak("Waking up. I'm ready.")
+                        speak("Waking up. I'm ready.", priority=PRIORITY_SYSTEM)
+                        warm_model_async()
                         print('[SYSTEM] Woken by voice command')
                     except Exception:
                         pass
                     return
             print(f"[IGNORED WHILE SLEEPING]: {text}")
+            self.update_listener_mode()
             return
 
         if not self.is_listening:
+            self.update_listener_mode()
             return
 
         print(f"[COMMAND]: {text}")
@@ -562,11 +2964,14 @@ class JarvisApp(QtWidgets.QMainWindow):
         if len(text) < 2:
             return
 
-        if "stop listening" in text or "go to sleep" in text:
-            speak("Going to sleep mode. Say Jarvis to wake me up.")
-            self.is_listening = False
-            self.ui.set_active(False)
-            self.hide()
+        if self.awaiting_command_since is not None:
+            self.record_wake_to_command("two-step", self.awaiting_command_since)
+            self.awaiting_command_since = None
+
+        intent = intent_router.match(text)
+        tracer.mark(trace_id, "intent")
+        if intent and intent[0] == "sleep":
+            self.go_to_sleep()
             return
 
         if self.is_writing_notes:
@@ -576,120 +2981,568 @@ class JarvisApp(QtWidgets.QMainWindow):
                 self.append_notes(text)
             return
 
-        if text.startswith("search for ") or text.startswith("search ") or text.startswith("google "):
-            for prefix in ("search for ", "search ", "google "):
-                if text.startswith(prefix):
-                    query = text[len(prefix):].strip()
-                    break
-            else:
-                query = text
-            self.open_chrome_search(query)
-            self.ui.set_active(True)
+        # Asking the same question again lets the answer already under way finish.
+        if not intent and llm_scheduler.already_answering(text):
             return
 
-        if text in ("new tab", "open tab", "open new tab"):
-            self.open_chrome_search(None)
-            return
+        # Any new command or question supersedes the answer still being read out.
+        speech_queue.interrupt()
 
-        if "open chrome" in text or text == "chrome" or text == "open browser":
-            self.open_chrome_search(None)
-            self.ui.set_active(True)
+        if intent:
+            name, handler, activate, slots = intent
+            llm_scheduler.cancel_all()
+            getattr(self, handler)(**slots)
+            if activate:
+                self.set_ui_active(True)
             return
 
-        if "close chrome" in text or text == "close browser":
-            self.close_chrome()
+        follow_up = self.conversation.is_follow_up(text)
+        cached = None if follow_up else response_cache.get(text)
+        if cached is not None:
+            print(f"[AI CACHE HIT]: {text}")
+            self.conversation.record(text, cached, {}, follow_up=False)
+            self.handleGemmaResponse(cached)
             return
 
-        if "youtube" in text:
-            webbrowser.open("https://www.youtube.com")
-            speak("Opening YouTube")
-            self.ui.set_active(True)
-            return
+        print(f"[AI QUERY]: {text}")
+        signal_obj = GemmaSignal()
+        stream = SpeechStream(trace_id)
+        signal_obj.token.connect(stream.feed)
+        signal_obj.finished.connect(lambda response: self.handleGemmaResponse(response, stream))
+        signal_obj.first_token.connect(self.handleGemmaFirstToken)
+        worker = GemmaWorker(text, signal_obj, trace_id, self.conversation, follow_up)
+        llm_scheduler.submit(worker)
+
+    def handleGemmaFirstToken(self, latency_ms):
+        log_metric("LLM first token", latency_ms)
+
+    def handleGemmaResponse(self, response, stream=None):
+        if stream is None:
+            # Cached answers arrive whole; split them into sentences like a streamed one.
+            stream = SpeechStream()
+            stream.feed(response or "")
+        stream.finish(response)
+
+        self.on_reply(response)
+        self.is_listening = True
+        self.set_ui_active(True)
+        print("[SYSTEM] Continuing to listen for commands...")
 
-        if text.startswith("search spotify for ") or text.startswith("spotify search ") or (text.startswith("play ") and " on spotify" in text):
-            if " on spotify" in text:
-                query = text.replace("play ", "").replace(" on spotify", "").strip()
-            else:
-                for prefix in ("search spotify for ", "spotify search "):
-                    if text.startswith(prefix):
-                        query = text[len(prefix):].strip()
-                        break
-            self.open_spotify(query)
-            self.ui.set_active(True)
-            return
+    def shutdown(self):
+        if self.note_writer:
+            self.note_writer.close()
+        response_cache.report()
+        speech_queue.put(None)
+        if self.listener and self.listener.isRunning():
+            self.listener.stop()
+            if not self.listener.wait(2000):
+                self.listener.terminate()
 
-        if "open spotify" in text or text == "spotify":
-            self.open_spotify(None)
-            self.ui.set_active(True)
-            return
+class JarvisApp(JarvisCore, QtWidgets.QMainWindow):
+    def __init__(self, listen=True):
+        super().__init__()
+        # Tray icon first so the user sees the assistant is starting; the slow work runs in the background.
+        with startup_profile.stage("tray icon"):
+            self.setup_tray()
+
+        with startup_profile.stage("window"):
+            self.ui = GlowUI()
+            self.setCentralWidget(self.ui)
+            self.setAttribute(QtCore.Qt.WidgetAttribute.WA_TranslucentBackground)
+            self.setWindowFlags(
+                QtCore.Qt.WindowType.FramelessWindowHint |
+                QtCore.Qt.WindowType.WindowStaysOnTopHint
+            )
 
-        if "close spotify" in text:
-            self.close_spotify()
-            return
+        self.init_core(listen)
 
-        if "open notes" in text or "start notes" in text or "take notes" in text:
-            self.open_notes()
-            return
+        # Startup announcement: run every time the app initializes.
+        def _startup_notify():
+            try:
+                speak("Jarvis is ready, say Jarvis to activate")
+            except Exception as e:
+                print(f"[STARTUP] Notify failed: {e}")
 
-        if "what time" in text or "tell me the time" in text or text == "time":
-            self.tell_time()
-            return
+        QtCore.QTimer.singleShot(1500, _startup_notify)
 
-        if "screenshot" in text or "take screenshot" in text:
-            self.take_screenshot()
-            return
+    def present(self):
+        self.showFullScreen()
+        self.activateWindow()
+        self.ui.set_active(True)
+
+    def set_ui_active(self, active):
+        self.ui.set_active(active)
+
+    def dismiss(self):
+        self.ui.set_active(False)
+        self.hide()
+
+    def test_tts_methods(self):
+        print("\n" + "="*60)
+        print("TESTING TTS METHODS...")
+        print("="*60)
+
+        methods = [
+            ("Windows SAPI", "Testing Windows built-in speech"),
+            ("PowerShell TTS", "Testing PowerShell speech synthesis"),
+            ("Edge TTS", "Testing online speech service")
+        ]
+
+        for i, (method_name, test_text) in enumerate(methods):
+            print(f"\nTesting {method_name}...")
+            QtCore.QTimer.singleShot(i * 3000, lambda m=method_name, t=test_text: self.test_method(m, t))
+
+        QtCore.QTimer.singleShot(len(methods) * 3000 + 2000, self.final_ready)
+
+    def test_method(self, method_name, test_text):
+        print(f"🎧 {method_name}: '{test_text}'")
+        speak(test_text)
 
-        if any(cmd in text for cmd in HIDE_COMMANDS):
-            speak("Minimizing to system tray")
+    def take_screenshot(self, monitor=SCREENSHOT_MONITOR):
+        """Hide the overlay, then capture on a worker once the compositor has caught up"""
+        was_visible = self.isVisible()
+        if was_visible:
             self.hide()
-            self.sleep_mode = True
-            self.is_listening = False
-            self.ui.set_active(False)
-            return
+        pos = QtGui.QCursor.pos()
+        screen = QtGui.QGuiApplication.screenAt(pos)
+        ratio = screen.devicePixelRatio() if screen else 1.0
+        cursor = (int(pos.x() * ratio), int(pos.y() * ratio))
+        QtCore.QTimer.singleShot(SCREENSHOT_HIDE_MS if was_visible else 0,
+                                 lambda: self.start_screenshot(monitor, cursor, was_visible))
 
-        print(f"[AI QUERY]: {text}")
-        signal_obj = GemmaSignal()
-        signal_obj.finished.connect(self.handleGemmaResponse)
-        worker = GemmaWorker(text, signal_obj)
-        QtCore.QThreadPool.globalInstance().start(worker)
+    def final_ready(self):
+        speak("All systems operational. Jarvis is ready. Say Jarvis to begin.")
+        print("✓ System fully ready - Say 'Jarvis' to activate!")
+
+    def setup_tray(self):
+        icon_path = os.path.join(BASE_PATH, "jarvis.ico")
+        if os.path.exists(icon_path):
+            icon = QtGui.QIcon(icon_path)
+        else:
+            pixmap = QtGui.QPixmap(32, 32)
+            pixmap.fill(QtGui.QColor(100, 200, 255))
+            icon = QtGui.QIcon(pixmap)
+
+        self.tray = QtWidgets.QSystemTrayIcon(icon)
+        self.tray.activated.connect(self.tray_activated)
+
+        menu = QtWidgets.QMenu()
+        show_action = menu.addAction("Show")
+        show_action.triggered.connect(self.show_window)
+        wake_action = menu.addAction("Wake")
+        wake_action.triggered.connect(self.wake_from_tray)
+        test_audio_action = menu.addAction("Test Audio")
+        test_audio_action.triggered.connect(self.test_audio)
+        stats_action = menu.addAction("Latency Stats")
+        stats_action.triggered.connect(self.show_latency_stats)
+        exit_action = menu.addAction("Exit")
+        exit_action.triggered.connect(self.exit_app)
+
+        self.tray.setContextMenu(menu)
+        self.tray.setVisible(True)
+        self.tray.showMessage("JARVIS", "Assistant is running in system tray", icon, 2000)
+
+    def show_latency_stats(self):
+        llm = llm_scheduler.stats()
+        summary = tracer.summary() + (f"\nLLM queue: {llm['queue_depth']} waiting, "
+                                      f"wait p50 {llm['wait_p50_ms']:.0f} / p95 {llm['wait_p95_ms']:.0f} ms")
+        print(f"[LATENCY]\n{summary}")
+        self.tray.showMessage("JARVIS latency", summary, QtWidgets.QSystemTrayIcon.MessageIcon.Information, 10000)
+
+    def test_audio(self):
+        speak("This is a manual audio test. Can you hear me clearly?")
+
+    def tray_activated(self, reason):
+        if reason == QtWidgets.QSystemTrayIcon.ActivationReason.DoubleClick:
+            self.show_window()
+
+    def show_window(self):
+        if self.sleep_mode:
+            warm_model_async()
+        self.sleep_mode = False
+        self.showFullScreen()
+        self.activateWindow()
+        self.raise_()
 
     def wake_from_tray(self):
         try:
             self.sleep_mode = False
-            self.showFullScreen()
-            self.activateWindow()
-            self.ui.set_active(True)
+            self.present()
             self.is_listening = True
-            speak("Waking up. I'm ready.")
+            speak("Waking up. I'm ready.", priority=PRIORITY_SYSTEM)
+            warm_model_async()
         except Exception:
             pass
 
-    def handleGemmaResponse(self, response):
-        if response:
-            clean_response = response.replace("*", "").replace("**", "").replace("__", "").strip()
-            speak(clean_response)
-
-        self.is_listening = True
-        self.ui.set_active(True)
-        print("[SYSTEM] Continuing to listen for commands...")
-
     def exit_app(self):
         speak("Shutting down")
         QtCore.QTimer.singleShot(1000, self.force_quit)
 
     def force_quit(self):
-        speech_queue.put(None)
-        if hasattr(self, 'listener') and self.listener.isRunning():
-            self.listener.terminate()
-            self.listener.wait(2000)
+        self.shutdown()
         self.tray.hide()
         QtWidgets.QApplication.quit()
 
+def parse_address(address):
+    """("unix", path) for "unix:/path", else ("tcp", (host, port)) with host defaulting to localhost"""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+class CommandServer:
+    """Newline-delimited JSON over a Unix or localhost TCP socket. Requests are
+    {"type": "text", "text": "what time is it"}, {"type": "stats"}, or
+    {"type": "pcm", "bytes": N} followed by N bytes of 16-bit mono PCM at SAMPLE_RATE.
+    Every connected client receives the events passed to broadcast()."""
+    def __init__(self, address, on_text, audio_source, stats=None):
+        self.address = address
+        self.on_text = on_text
+        self.audio_source = audio_source
+        self.stats = stats
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.server = None
+
+    def send(self, wfile, event):
+        line = (json.dumps(event) + "\n").encode()
+        with self.lock:
+            try:
+                wfile.write(line)
+                wfile.flush()
+            except OSError:
+                self.clients.discard(wfile)
+
+    def broadcast(self, event):
+        with self.lock:
+            clients = list(self.clients)
+        for wfile in clients:
+            self.send(wfile, event)
+
+    def handle_request(self, request, rfile, wfile):
+        kind = request.get("type")
+        if kind == "text":
+            self.on_text(str(request.get("text", "")))
+        elif kind == "pcm":
+            if request.get("sample_rate", SAMPLE_RATE) != self.audio_source.sample_rate:
+                raise ValueError(f"PCM must be {self.audio_source.sample_rate} Hz")
+            data = rfile.read(int(request["bytes"]))
+            self.audio_source.push(data[:len(data) - len(data) % 2])
+        elif kind == "stats":
+            self.send(wfile, dict(self.stats() if self.stats else {}, event="stats"))
+        else:
+            raise ValueError(f"Unknown request type: {kind}")
+
+    def start(self):
+        import socketserver
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                with server.lock:
+                    server.clients.add(self.wfile)
+                try:
+                    for line in self.rfile:
+                        if not line.strip():
+                            continue
+                        try:
+                            server.handle_request(json.loads(line), self.rfile, self.wfile)
+                        except (ValueError, KeyError, TypeError) as e:
+                            server.send(self.wfile, {"event": "error", "message": str(e)})
+                except OSError:
+                    pass
+                finally:
+                    with server.lock:
+                        server.clients.discard(self.wfile)
+
+        family, address = parse_address(self.address)
+        if family == "unix":
+            if os.path.exists(address):
+                os.unlink(address)
+            self.server = socketserver.ThreadingUnixStreamServer(address, Handler)
+        else:
+            socketserver.ThreadingTCPServer.allow_reuse_address = True
+            self.server = socketserver.ThreadingTCPServer(address, Handler)
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"[SYSTEM] Headless command socket on {self.address}")
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+class HeadlessJarvis(JarvisCore, QtCore.QObject):
+    """The assistant without widgets or a microphone: text commands and PCM arrive over a
+    local socket and replies and speech are broadcast back. Starts awake, as there is no
+    window to summon."""
+    text_received = QtCore.pyqtSignal(str)
+
+    def __init__(self, address=HEADLESS_ADDRESS):
+        super().__init__()
+        self.audio = SocketAudioSource()
+        self.server = CommandServer(address, self.text_received.emit, self.audio, self.stats)
+        self.text_received.connect(self.handle_text)
+        self.init_core(source=self.audio)
+        self.is_listening = True
+        self.listener.wake.connect(lambda trace_id: self.server.broadcast({"event": "wake", "trace_id": trace_id}))
+        self.listener.text.connect(
+            lambda text, trace_id: self.server.broadcast({"event": "heard", "text": text, "trace_id": trace_id}))
+        speech_observers.append(
+            lambda event, text, trace_id: self.server.broadcast({"event": event, "text": text, "trace_id": trace_id}))
+
+    def handle_text(self, text):
+        """Treat a typed line like a final ASR result"""
+        text = text.lower().strip()
+        trace_id = tracer.start()
+        command = split_wake_command(text)
+        if command is not None:
+            self.onWakeCommand(command, trace_id)
+        else:
+            self.onText(text, trace_id)
+
+    def on_reply(self, response):
+        self.server.broadcast({"event": "reply", "text": response, "trace_id": tracer.current})
+
+    def stats(self):
+        return {"rss_mb": peak_rss_mb(), "llm_scheduler": llm_scheduler.stats(), "latency": tracer.snapshot()}
+
+def run_headless(address=HEADLESS_ADDRESS):
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication(sys.argv)
+    daemon = HeadlessJarvis(address)
+    daemon.server.start()
+    if peak_rss_mb() is not None:
+        log_metric("Peak RSS", peak_rss_mb(), "MB")
+    app.aboutToQuit.connect(daemon.shutdown)
+    return app.exec()
+
+class RecognizerPool:
+    """KaldiRecognizers over one shared model, reset and handed to the next stream"""
+    def __init__(self, model, sample_rate=SAMPLE_RATE):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.idle = []
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+            self.created += 1
+        import vosk
+        return vosk.KaldiRecognizer(self.model, self.sample_rate)
+
+    def release(self, recognizer):
+        recognizer.Reset()
+        with self.lock:
+            self.idle.append(recognizer)
+
+class ASRStream:
+    """One client's audio: a bounded block queue decoded in order by whichever worker picks it up"""
+    def __init__(self, send, queue_blocks, partials=False):
+        self.send = send
+        self.queue = Queue(maxsize=queue_blocks)
+        self.partials = partials
+        self.last_partial = ""
+        self.recognizer = None
+        self.scheduled = False
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+class ASRService:
+    """Serves many concurrent PCM streams from one loaded model. Streams with queued audio wait
+    on a ready queue for ASR_WORKERS decode threads; a stream is only ever on one worker at a
+    time, so its audio is decoded in order, and a full stream queue blocks that client's reader."""
+    def __init__(self, model, workers=ASR_WORKERS, sample_rate=SAMPLE_RATE, queue_blocks=ASR_STREAM_QUEUE_BLOCKS):
+        self.pool = RecognizerPool(model, sample_rate)
+        self.sample_rate = sample_rate
+        self.block_bytes = int(sample_rate * ASR_BLOCK_MS / 1000) * 2
+        self.queue_blocks = queue_blocks
+        self.ready = Queue()
+        self.lock = threading.Lock()
+        self.streams = 0
+        self.peak_streams = 0
+        self.audio_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.server = None
+        for _ in range(workers):
+            Thread(target=self._worker, daemon=True).start()
+
+    def open_stream(self, send, partials=False):
+        stream = ASRStream(send, self.queue_blocks, partials)
+        stream.recognizer = self.pool.acquire()
+        with self.lock:
+            self.streams += 1
+            self.peak_streams = max(self.peak_streams, self.streams)
+        return stream
+
+    def feed(self, stream, data):
+        """Queue audio, blocking while the stream's backlog is full"""
+        stream.queue.put(data)
+        self._schedule(stream)
+
+    def end(self, stream):
+        stream.queue.put(None)
+        self._schedule(stream)
+
+    def _schedule(self, stream):
+        with stream.lock:
+            if not stream.scheduled:
+                stream.scheduled = True
+                self.ready.put(stream)
+
+    def _worker(self):
+        while True:
+            stream = self.ready.get()
+            # A few blocks per turn keeps one busy stream from starving the others.
+            for _ in range(4):
+                try:
+                    data = stream.queue.get_nowait()
+                except Empty:
+                    break
+                if data is None:
+                    self._finish(stream)
+                    break
+                self._decode(stream, data)
+            with stream.lock:
+                if stream.queue.empty() or stream.done.is_set():
+                    stream.scheduled = False
+                else:
+                    self.ready.put(stream)
+
+    def _decode(self, stream, data):
+        started = time.thread_time()
+        if stream.recognizer.AcceptWaveform(data):
+            text = json.loads(stream.recognizer.Result()).get("text", "")
+            if text:
+                stream.send({"text": text, "final": True})
+        elif stream.partials:
+            partial = json.loads(stream.recognizer.PartialResult()).get("partial", "")
+            if partial != stream.last_partial:
+                stream.last_partial = partial
+                stream.send({"text": partial, "final": False})
+        with self.lock:
+            self.cpu_seconds += time.thread_time() - started
+            self.audio_seconds += len(data) / 2 / self.sample_rate
+
+    def _finish(self, stream):
+        text = json.loads(stream.recognizer.FinalResult()).get("text", "")
+        if text:
+            stream.send({"text": text, "final": True})
+        stream.send({"eof": True})
+        self.pool.release(stream.recognizer)
+        stream.recognizer = None
+        with self.lock:
+            self.streams -= 1
+        stream.done.set()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "streams": self.streams,
+                "peak_streams": self.peak_streams,
+                "recognizers": self.pool.created,
+                "audio_seconds": round(self.audio_seconds, 1),
+                "real_time_factor": round(self.cpu_seconds / self.audio_seconds, 4) if self.audio_seconds else None,
+            }
+
+    def serve(self, address=ASR_SERVICE_ADDRESS):
+        """Accept streams on a Unix or localhost TCP socket. A client sends one JSON header line
+        ({"sample_rate": 16000, "partials": false}), then raw 16-bit mono PCM until it shuts
+        down its write side; results come back as JSON lines ending with {"eof": true}."""
+        import socketserver
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                write_lock = threading.Lock()
+
+                def send(event):
+                    with write_lock:
+                        try:
+                            self.wfile.write((json.dumps(event) + "\n").encode())
+                            self.wfile.flush()
+                        except OSError:
+                            pass
+
+                try:
+                    header = json.loads(self.rfile.readline() or b"{}")
+                except ValueError:
+                    send({"error": "Expected a JSON header line"})
+                    return
+                if header.get("sample_rate", service.sample_rate) != service.sample_rate:
+                    send({"error": f"PCM must be {service.sample_rate} Hz"})
+                    return
+                stream = service.open_stream(send, bool(header.get("partials")))
+                try:
+                    while True:
+                        data = self.rfile.read(service.block_bytes)
+                        if not data:
+                            break
+                        service.feed(stream, data[:len(data) - len(data) % 2])
+                except OSError:
+                    pass
+                finally:
+                    service.end(stream)
+                    stream.done.wait()
+
+        family, address = parse_address(address)
+        if family == "unix":
+            if os.path.exists(address):
+                os.unlink(address)
+            self.server = socketserver.ThreadingUnixStreamServer(address, Handler)
+        else:
+            socketserver.ThreadingTCPServer.allow_reuse_address = True
+            self.server = socketserver.ThreadingTCPServer(address, Handler)
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server
+
+def run_asr_service(address=ASR_SERVICE_ADDRESS):
+    model = load_model()
+    if model is None:
+        return 1
+    service = ASRService(model)
+    service.serve(address)
+    print(f"[SYSTEM] ASR service on {address} with {ASR_WORKERS} decode threads")
+    try:
+        while True:
+            time.sleep(STATS_REPORT_SECONDS)
+            print(f"[ASR] {json.dumps(service.stats())}")
+    except KeyboardInterrupt:
+        return 0
+
 if __name__ == "__main__":
-    app = QtWidgets.QApplication(sys.argv)
-    app.setQuitOnLastWindowClosed(False)
+    ASR_PROCESS = ASR_PROCESS or "--asr-process" in sys.argv
+    if "--asr-service" in sys.argv:
+        index = sys.argv.index("--asr-service") + 1
+        has_address = index < len(sys.argv) and not sys.argv[index].startswith("--")
+        check_model_path()
+        sys.exit(run_asr_service(sys.argv[index] if has_address else ASR_SERVICE_ADDRESS))
+    if "--headless" in sys.argv:
+        index = sys.argv.index("--headless") + 1
+        has_address = index < len(sys.argv) and not sys.argv[index].startswith("--")
+        sys.exit(run_headless(sys.argv[index] if has_address else HEADLESS_ADDRESS))
+
+    startup_profile.enabled = "--startup-profile" in sys.argv
+    check_model_path()
+
+    with startup_profile.stage("QApplication"):
+        app = QtWidgets.QApplication(sys.argv)
+        app.setQuitOnLastWindowClosed(False)
 
     window = JarvisApp()
-    window.hide()
 
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""EdgeTTSBackend streaming with a local fake chunk source and a player that discards its input"""
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PyQt6")
+import main  # noqa: E402
+from benchmarks import fake_mp3_source  # noqa: E402
+
+SINK = [sys.executable, "-c", "import shutil, sys, os; shutil.copyfileobj(sys.stdin.buffer, open(os.devnull, 'wb'))"]
+TEXT = "A sentence long enough to arrive as several chunks of streamed audio, one after another."
+
+
+class RecordingEdge(main.EdgeTTSBackend):
+    TAIL_SECONDS = 0.0
+
+    def __init__(self, chunk_source):
+        super().__init__(chunk_source=chunk_source, player_cmd=SINK)
+        self.written = []
+
+    def _write(self, data):
+        self.written.append((time.monotonic(), len(data)))
+        return super()._write(data)
+
+
+def stalling_source(stall, events):
+    """One chunk, then nothing for stall seconds"""
+    async def chunks(text):
+        try:
+            yield bytes(600)
+            await asyncio.sleep(stall)
+            yield bytes(600)
+        finally:
+            events.append("closed")
+    return chunks
+
+
+@pytest.fixture
+def backends():
+    started = []
+
+    def make(chunk_source):
+        backend = RecordingEdge(chunk_source)
+        backend.ensure_started()
+        started.append(backend)
+        return backend
+
+    yield make
+    for backend in started:
+        backend.close()
+
+
+def test_playback_starts_on_first_chunk(backends):
+    backend = backends(fake_mp3_source(chunk_bytes=600, chunk_delay=0.05, bytes_per_char=60))
+    started = time.monotonic()
+    backend.speak(TEXT)
+
+    chunks = len(backend.written)
+    assert chunks > 5
+    assert backend.first_audio_at - started < 0.2
+    assert backend.written[-1][0] - backend.first_audio_at > (chunks - 2) * 0.05
+
+
+def test_chunk_timeout_applies_per_chunk(backends):
+    backend = backends(fake_mp3_source(chunk_bytes=600, chunk_delay=0.1, bytes_per_char=60))
+    backend.CHUNK_TIMEOUT = 0.3
+    started = time.monotonic()
+    audio = backend.synthesize(TEXT)
+    assert time.monotonic() - started > backend.CHUNK_TIMEOUT * 2
+    assert len(audio) == len(TEXT) * 60
+
+
+def test_chunk_timeout_stops_a_stalled_stream(backends):
+    events = []
+    backend = backends(stalling_source(5.0, events))
+    backend.CHUNK_TIMEOUT = 0.2
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        backend.speak(TEXT)
+    assert time.monotonic() - started < 1.0
+    assert len(backend.written) == 1
+    assert events == ["closed"]
+
+
+def test_stop_cancels_the_stream_and_kills_the_player(backends):
+    events = []
+    backend = backends(stalling_source(5.0, events))
+    speaker = threading.Thread(target=backend.speak, args=(TEXT,))
+    speaker.start()
+    deadline = time.monotonic() + 2
+    while backend.first_audio_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    player, future = backend.player, backend.future
+    assert player is not None and player.poll() is None
+
+    backend.stop()
+    speaker.join(1.0)
+
+    assert not speaker.is_alive()
+    assert future.cancelled()
+    assert player.wait(1.0) is not None
+    assert backend.player is None
+    time.sleep(0.1)
+    assert events == ["closed"]
@@ -0,0 +1,92 @@
+"""The headless daemon over its command socket, with the stub Ollama server and silent TTS"""
+import json
+import socket
+import time
+
+import pytest
+
+pytest.importorskip("PyQt6")
+import main  # noqa: E402
+from benchmarks import StubOllamaServer  # noqa: E402
+
+ANSWER = "Paris is the capital of France. It is known for the Eiffel Tower."
+
+
+@pytest.fixture
+def client(monkeypatch):
+    stub = StubOllamaServer(answer=ANSWER, load_delay=0.0, first_token_delay=0.0, token_delay=0.0).start()
+    monkeypatch.setattr(main, "ollama_client", main.OllamaClient(stub.address))
+    monkeypatch.setattr(main, "response_cache", main.ResponseCache(max_entries=0, path=None))
+    monkeypatch.setattr(main, "tts_engine", main.GuaranteedTTS([main.FakeTTSBackend()]))
+    monkeypatch.setattr(main, "speech_observers", [])
+    monkeypatch.setattr(main, "tts_thread", None)
+    monkeypatch.setattr(main, "METRICS_PORT", None)
+    app = main.QtCore.QCoreApplication.instance() or main.QtCore.QCoreApplication([])
+    daemon = main.HeadlessJarvis("127.0.0.1:0")
+    daemon.server.start()
+    sock = socket.create_connection(daemon.server.server.server_address[:2])
+    sock.settimeout(0.02)
+    client = HeadlessClient(app, sock)
+    yield client
+    sock.close()
+    daemon.server.stop()
+    daemon.shutdown()
+    main.tts_thread.join(2)
+    stub.stop()
+
+
+class HeadlessClient:
+    def __init__(self, app, sock):
+        self.app = app
+        self.sock = sock
+        self.buffer = b""
+        self.events = []
+
+    def send(self, request):
+        self.sock.sendall((json.dumps(request) + "\n").encode())
+
+    def wait_for(self, condition, timeout=10.0):
+        """Pump Qt events and read socket events until condition(events) holds"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.app.processEvents()
+            try:
+                self.buffer += self.sock.recv(65536)
+            except socket.timeout:
+                pass
+            *lines, self.buffer = self.buffer.split(b"\n")
+            self.events += [json.loads(line) for line in lines if line.strip()]
+            if condition(self.events):
+                return self.events
+        raise AssertionError(f"timed out; events so far: {self.events}")
+
+
+def spoken(events):
+    return [event["text"] for event in events if event["event"] == "spoken"]
+
+
+def test_command_is_spoken(client):
+    client.send({"type": "text", "text": "what time is it"})
+    events = client.wait_for(lambda events: spoken(events))
+    speech = [event for event in events if event["event"] == "speech"]
+    assert speech[0]["text"].startswith("The time is")
+    assert spoken(events) == [speech[0]["text"]]
+    assert speech[0]["trace_id"]
+
+
+def test_question_is_answered_and_spoken(client):
+    client.send({"type": "text", "text": "what is the capital of france"})
+    # Sentences are spoken as they stream, so the reply may come before or after them.
+    events = client.wait_for(lambda events: len(spoken(events)) == 2 and any(e["event"] == "reply" for e in events))
+    replies = [event for event in events if event["event"] == "reply"]
+    assert [reply["text"] for reply in replies] == [ANSWER]
+    assert spoken(events) == ["Paris is the capital of France.", "It is known for the Eiffel Tower."]
+
+
+def test_stats_and_unknown_requests(client):
+    client.send({"type": "stats"})
+    client.send({"type": "bogus"})
+    events = client.wait_for(lambda events: len(events) >= 2)
+    assert events[0]["event"] == "stats"
+    assert {"rss_mb", "llm_scheduler", "latency"} <= set(events[0])
+    assert events[1] == {"event": "error", "message": "Unknown request type: bogus"}
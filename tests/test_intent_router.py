@@ -0,0 +1,138 @@
+"""IntentRouter must route commands exactly like the if/elif chain it replaced in onText"""
+import random
+
+import pytest
+
+pytest.importorskip("PyQt6")
+import main  # noqa: E402
+
+# Intents added after the table replaced the chain; the old chain sent these to the LLM.
+NEW_INTENTS = {"stop_speaking", "screenshot_all"}
+
+
+def legacy_route(text):
+    """The command checks of the original onText, in their original order, returning
+    (handler, slots) with today's handler names instead of calling them"""
+    if "stop listening" in text or "go to sleep" in text:
+        return "go_to_sleep", {}
+
+    if text.startswith("search for ") or text.startswith("search ") or text.startswith("google "):
+        for prefix in ("search for ", "search ", "google "):
+            if text.startswith(prefix):
+                query = text[len(prefix):].strip()
+                break
+        else:
+            query = text
+        return "open_chrome_search", {"query": query}
+
+    if text in ("new tab", "open tab", "open new tab"):
+        return "open_chrome_search", {}
+
+    if "open chrome" in text or text == "chrome" or text == "open browser":
+        return "open_chrome_search", {}
+
+    if "close chrome" in text or text == "close browser":
+        return "close_chrome", {}
+
+    if "youtube" in text:
+        return "open_youtube", {}
+
+    if text.startswith("search spotify for ") or text.startswith("spotify search ") or (text.startswith("play ") and " on spotify" in text):
+        if " on spotify" in text:
+            query = text.replace("play ", "").replace(" on spotify", "").strip()
+        else:
+            for prefix in ("search spotify for ", "spotify search "):
+                if text.startswith(prefix):
+                    query = text[len(prefix):].strip()
+                    break
+        return "open_spotify", {"query": query}
+
+    if "open spotify" in text or text == "spotify":
+        return "open_spotify", {}
+
+    if "close spotify" in text:
+        return "close_spotify", {}
+
+    if "open notes" in text or "start notes" in text or "take notes" in text:
+        return "open_notes", {}
+
+    if "what time" in text or "tell me the time" in text or text == "time":
+        return "tell_time", {}
+
+    if "screenshot" in text or "take screenshot" in text:
+        return "take_screenshot", {}
+
+    if any(cmd in text for cmd in main.HIDE_COMMANDS):
+        return "minimize_to_tray", {}
+
+    return None
+
+
+def route(text):
+    match = main.intent_router.match(text)
+    if match is None:
+        return None
+    name, handler, activate, slots = match
+    return handler, slots
+
+
+def degenerate_spotify(text):
+    """'play ... on spotify' forms the old string replace mangled: nothing between the two,
+    text after 'on spotify', or a second 'play ' inside the query"""
+    if not (text.startswith("play ") and " on spotify" in text):
+        return False
+    return (text == "play on spotify" or not text.endswith(" on spotify")
+            or text.count("play ") > 1 or text.count(" on spotify") > 1)
+
+
+CORPUS = [
+    "go to sleep", "please stop listening now",
+    "search for black holes", "search cats", "google the weather in paris", "searchlight",
+    "new tab", "open tab", "open new tab", "new tab please",
+    "open chrome", "please open chrome now", "chrome", "open browser",
+    "close chrome", "close browser",
+    "open youtube", "youtube music on spotify",
+    "search spotify for jazz", "spotify search daft punk", "play bohemian rhapsody on spotify",
+    "open spotify", "spotify", "close spotify",
+    "open notes", "start notes", "take notes", "close notes",
+    "what time is it", "tell me the time", "time", "timer",
+    "take a screenshot", "take screenshot", "screenshot please",
+    "hide yourself", "minimize", "i closed the door", "enclosed",
+    "what is the capital of france", "tell me a joke", "how far away is the moon", "",
+]
+
+VOCABULARY = [
+    "search", "for", "google", "spotify", "play", "on", "open", "close", "chrome", "browser",
+    "new", "tab", "youtube", "notes", "start", "take", "what", "time", "tell", "me", "the",
+    "screenshot", "hide", "yourself", "minimize", "stop", "listening", "go", "to", "sleep",
+    "jazz", "weather", "is", "it", "closed",
+]
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_corpus_matches_legacy_chain(text):
+    assert route(text) == legacy_route(text)
+
+
+def test_random_command_words_match_legacy_chain():
+    rng = random.Random(0)
+    checked = 0
+    for _ in range(20000):
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 5)))
+        match = main.intent_router.match(text)
+        if degenerate_spotify(text) or (match and match[0] in NEW_INTENTS):
+            continue
+        assert route(text) == legacy_route(text), text
+        checked += 1
+    assert checked > 15000
+
+
+def test_degenerate_spotify_forms():
+    assert route("play on spotify") is None
+    assert route("play jazz on spotify please") == ("open_spotify", {"query": "jazz"})
+
+
+def test_new_intents():
+    assert route("stop") == ("stop_speaking", {})
+    assert route("stop listening") == ("go_to_sleep", {})
+    assert route("take a screenshot of all monitors") == ("take_screenshot_all", {})
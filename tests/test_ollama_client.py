@@ -0,0 +1,151 @@
+"""OllamaClient against the local stub server: streaming, timeouts, pooling, cancellation and warm-up"""
+import socket
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PyQt6")
+import main  # noqa: E402
+from benchmarks import StubOllamaServer  # noqa: E402
+
+ANSWER = "Paris is the capital of France. It is known for the Eiffel Tower and its museums."
+
+
+@pytest.fixture
+def stub():
+    server = StubOllamaServer(answer=ANSWER, load_delay=0.0, first_token_delay=0.0, token_delay=0.0).start()
+    yield server
+    server.stop()
+
+
+def test_streams_tokens_and_returns_final_chunk(stub):
+    client = main.OllamaClient(stub.address)
+    tokens = []
+    result = client.generate("what is the capital of france", on_token=tokens.append, keep_alive="5m")
+
+    assert len(tokens) == len(ANSWER.split(" "))
+    assert result["response"] == "".join(tokens)
+    assert result["response"].strip() == ANSWER
+    assert result["done"] is True
+    assert result["context"]
+    request = stub.requests[0]
+    assert request["stream"] is True
+    assert request["model"] == main.MODEL_NAME
+    assert request["keep_alive"] == "5m"
+
+
+def test_context_is_sent_back(stub):
+    client = main.OllamaClient(stub.address)
+    first = client.generate("hello")
+    client.generate("and then", context=first["context"])
+    assert stub.requests[1]["context"] == first["context"]
+
+
+def test_sequential_requests_reuse_one_connection(stub):
+    client = main.OllamaClient(stub.address)
+    client.generate("one")
+    client.generate("two")
+    assert client.is_loaded()
+    assert stub.connections == 1
+    assert client._pool.qsize() == 1
+
+
+def test_connect_timeout():
+    # A listener that never accepts: once its backlog is full further handshakes hang.
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(0)
+    port = listener.getsockname()[1]
+    backlog = []
+    try:
+        for _ in range(8):
+            sock = socket.socket()
+            sock.setblocking(False)
+            sock.connect_ex(("127.0.0.1", port))
+            backlog.append(sock)
+        time.sleep(0.1)
+        client = main.OllamaClient(f"127.0.0.1:{port}", connect_timeout=0.2)
+        started = time.monotonic()
+        with pytest.raises(socket.timeout):
+            client.generate("hello")
+        assert time.monotonic() - started < 2
+    finally:
+        for sock in backlog:
+            sock.close()
+        listener.close()
+
+
+def test_first_token_timeout():
+    server = StubOllamaServer(load_delay=0.0, first_token_delay=1.0, token_delay=0.0).start()
+    try:
+        client = main.OllamaClient(server.address, first_token_timeout=0.2)
+        started = time.monotonic()
+        with pytest.raises(socket.timeout):
+            client.generate("hello")
+        assert time.monotonic() - started < 1.0
+        assert client._pool.qsize() == 0
+    finally:
+        server.stop()
+
+
+def test_cancel_mid_stream():
+    server = StubOllamaServer(answer=ANSWER, load_delay=0.0, first_token_delay=0.0, token_delay=0.05).start()
+    try:
+        client = main.OllamaClient(server.address)
+        cancel = main.CancelToken()
+        tokens = []
+
+        def on_token(token):
+            tokens.append(token)
+            if len(tokens) == 3:
+                cancel.cancel()
+
+        with pytest.raises(main.OllamaCancelled):
+            client.generate("hello", on_token=on_token, cancel=cancel)
+        assert len(tokens) == 3
+        # A cancelled stream is never handed back to the pool.
+        assert client._pool.qsize() == 0
+    finally:
+        server.stop()
+
+
+def test_cancel_before_first_token():
+    server = StubOllamaServer(load_delay=0.0, first_token_delay=2.0, token_delay=0.0).start()
+    try:
+        client = main.OllamaClient(server.address)
+        cancel = main.CancelToken()
+        threading.Timer(0.2, cancel.cancel).start()
+        started = time.monotonic()
+        with pytest.raises(main.OllamaCancelled):
+            client.generate("hello", cancel=cancel)
+        assert time.monotonic() - started < 1.5
+    finally:
+        server.stop()
+
+
+def test_warm_loads_once_and_reports_residency():
+    server = StubOllamaServer(load_delay=0.3, first_token_delay=0.0, token_delay=0.0).start()
+    try:
+        client = main.OllamaClient(server.address)
+        resident, elapsed_ms = client.warm(keep_alive="30m")
+        assert resident is False
+        assert elapsed_ms >= 300
+        assert server.requests[-1] == {"model": main.MODEL_NAME, "keep_alive": "30m", "stream": False}
+
+        resident, elapsed_ms = client.warm()
+        assert resident is True
+        assert elapsed_ms < 300
+    finally:
+        server.stop()
+
+
+def test_release_does_not_load_a_missing_model(stub):
+    client = main.OllamaClient(stub.address)
+    client.release()
+    assert stub.requests == []
+    assert not client.is_loaded()
+
+    client.warm()
+    client.release(keep_alive="5m")
+    assert stub.requests[-1] == {"model": main.MODEL_NAME, "keep_alive": "5m", "stream": False}
@@ -0,0 +1,51 @@
+"""PhraseAudioCache: only fixed phrases are looked up, and disk eviction follows playback"""
+import os
+
+import pytest
+
+pytest.importorskip("PyQt6")
+import main  # noqa: E402
+
+
+class ClipBackend(main.FakeTTSBackend):
+    """Fake engine that, unlike FakeTTSBackend, is worth caching"""
+    name = "clip"
+    cache_phrases = True
+
+
+def test_only_phrases_are_looked_up(tmp_path):
+    cache = main.PhraseAudioCache(str(tmp_path), phrases=["Noted"])
+    backend = ClipBackend()
+    cache.put("Noted", backend, b"noted")
+    engine = main.GuaranteedTTS([backend], phrase_cache=cache)
+
+    engine.speak("Paris is the capital of France.")
+    engine.speak("Noted")
+
+    assert cache.misses == 0
+    assert cache.hits == 1
+    assert [text for _, text in backend.spoken] == ["Paris is the capital of France.", "noted"]
+
+
+def test_fake_and_print_backends_are_not_filled(tmp_path):
+    cache = main.PhraseAudioCache(str(tmp_path), phrases=["Noted"])
+    for backend in (main.FakeTTSBackend(), main.PrintBackend()):
+        cache.fill_async(backend)
+    assert not cache.filled
+    assert os.listdir(tmp_path) == []
+
+
+def test_memory_hits_keep_clips_on_disk(tmp_path):
+    backend = ClipBackend()
+    cache = main.PhraseAudioCache(str(tmp_path), max_bytes=10, phrases=["a", "b", "c"])
+    cache.put("a", backend, b"aaaa")
+    cache.put("b", backend, b"bbbb")
+    old = os.path.getmtime(cache._path(cache.key("b", backend))) - 60
+    for text in ("a", "b"):
+        os.utime(cache._path(cache.key(text, backend)), (old, old))
+
+    assert cache.get("a", backend) == b"aaaa"  # from memory
+    cache.put("c", backend, b"cccc")
+
+    assert os.path.exists(cache._path(cache.key("a", backend)))
+    assert not os.path.exists(cache._path(cache.key("b", backend)))
@@ -0,0 +1,57 @@
+"""Tracer: per-stage latencies and the opt-in JSONL log"""
+import json
+
+import pytest
+
+pytest.importorskip("PyQt6")
+import main  # noqa: E402
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(main.time, "perf_counter", lambda: now[0])
+    return now
+
+
+def test_each_stage_is_timed_from_the_one_before(clock):
+    tracer = main.Tracer(jsonl_path=None)
+    trace_id = tracer.start()
+    for _ in range(100):  # three seconds of speech
+        clock[0] += 0.03
+        tracer.speech(trace_id)
+    clock[0] += 0.5  # VAD hangover and decoder endpoint
+    for stage, delay in (("asr_final", 0.0), ("intent", 0.002), ("llm_first_token", 0.3),
+                         ("tts_start", 0.1), ("llm_done", 0.4), ("tts_end", 1.5)):
+        clock[0] += delay
+        tracer.mark(trace_id, stage)
+
+    latest = {stage: values[-1] for stage, values in tracer.histograms.items() if values}
+    assert latest == pytest.approx({
+        "asr_final": 500, "intent": 2, "llm_first_token": 300, "tts_start": 100,
+        "llm_done": 400, "tts_end": 1500, main.TRACE_RESPONSE: 902,
+    })
+
+
+def test_adopted_trace_keeps_its_end_of_speech(clock):
+    tracer = main.Tracer(jsonl_path=None)
+    tracer.adopt("child-1", 3.0, 0.25)
+    tracer.mark("child-1", "asr_final")
+    assert tracer.histograms["asr_final"][-1] == pytest.approx(250)
+
+
+def test_log_skips_discarded_traces_and_rotates(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    tracer = main.Tracer(jsonl_path=path, max_bytes=400)
+    tracer.discard(tracer.start())
+    for _ in range(4):
+        trace_id = tracer.start()
+        tracer.mark(trace_id, "asr_final")
+        tracer.mark(trace_id, "tts_end")
+
+    records = []
+    for name in (path + ".1", path):
+        with open(name, encoding="utf-8") as f:
+            records += [json.loads(line) for line in f]
+    assert [record["stage"] for record in records] == ["capture", "asr_final", "tts_end"] * 4
+    assert len({record["trace"] for record in records}) == 4
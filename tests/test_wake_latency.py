@@ -0,0 +1,31 @@
+"""Wake latency on recorded audio through the listener's real path: VoicePipeline, the VAD and
+AUDIO_FRAME_MS frames. Needs vosk and the model; skipped otherwise."""
+import os
+
+import pytest
+
+pytest.importorskip("PyQt6")
+pytest.importorskip("vosk")
+import main  # noqa: E402
+from benchmarks import replay_wake, speech_end_offset  # noqa: E402
+
+# "Jarvis, what time is it?" (espeak-ng, 16 kHz mono) with silence before and after
+RECORDING = os.path.join(os.path.dirname(__file__), "data", "jarvis_what_time.wav")
+
+
+@pytest.fixture(scope="module")
+def model():
+    model = main.load_model()
+    if model is None:
+        pytest.skip(f"Vosk model not available at {main.vosk_model_path}")
+    return model
+
+
+def test_partial_result_wake_fires_before_final_result(model):
+    wake_at, final_at = replay_wake(RECORDING, model)
+
+    assert wake_at is not None, "wake word not spotted in the partial results"
+    assert final_at is not None, "no final result"
+    assert wake_at < final_at
+    # The point of the partial-result path: the wake word is caught while the user is still talking.
+    assert wake_at < speech_end_offset(RECORDING)